@@ -1,132 +1,244 @@
 #!/usr/bin/env
 import argparse
-import time
 
-def bubble_sort(arr):
-    print(f"Running bubble_sort on list: {arr}\n")
-    time.sleep(1)
+from steptrace import COMPARE, MERGE, PARTITION, SELECT, SET, SWAP, Trace, play, recorder
+
+def bubble_sort(arr, trace=None):
+    record = recorder(trace)
     swap_counter = 1
     while swap_counter != 0:
         swap_counter = 0
         for i in range (1,len(arr)):
-            num1 = arr[i-1]
-            num2 = arr[i]
-            if num1 > num2:
-                temp = num2
-                arr[i] = num1
-                arr[i-1] = temp
+            record(COMPARE, i-1, i)
+            if arr[i-1] > arr[i]:
+                arr[i-1], arr[i] = arr[i], arr[i-1]
+                record(SWAP, i-1, i)
                 swap_counter+=1
-                print(f"Swapped {num1} and {num2}. Updated list: {arr}")
-                time.sleep(1)
-    print("Finished bubble sort algorithm\n")
-    time.sleep(1)
     return arr
 
 
 
-def merge_sort(arr, delay=1):
-    if len(arr) <= 1:
+def merge_sort(arr, trace=None, lo=0, hi=None):
+    """Top-down merge sort of arr[lo:hi], written back into arr"""
+    if hi is None:
+        hi = len(arr)
+    if hi - lo <= 1:
         return arr
 
-    mid = len(arr) // 2
-    left = merge_sort(arr[:mid], delay)
-    right = merge_sort(arr[mid:], delay)
-    return merge(left, right, delay)
+    mid = lo + (hi - lo) // 2
+    merge_sort(arr, trace, lo, mid)
+    merge_sort(arr, trace, mid, hi)
+    merge(arr, lo, mid, hi, trace)
+    return arr
 
-def merge(left, right, delay=1):
-    result = []
+def merge(arr, lo, mid, hi, trace=None):
+    record = recorder(trace)
+    record(MERGE, lo, hi)
+    left = arr[lo:mid]
+    right = arr[mid:hi]
     i = j = 0
-    print(f"Merging {left} and {right}")
-    time.sleep(delay)
+    k = lo
 
     while i < len(left) and j < len(right):
         if left[i] <= right[j]:
-            result.append(left[i])
+            arr[k] = left[i]
             i += 1
         else:
-            result.append(right[j])
+            arr[k] = right[j]
             j += 1
-        print(f"  Partial merged list: {result}")
-        time.sleep(delay)
+        record(SET, k, arr[k])
+        k += 1
 
     while i < len(left):
-        result.append(left[i])
+        arr[k] = left[i]
+        record(SET, k, arr[k])
         i += 1
-        print(f"  Partial merged list: {result}")
-        time.sleep(delay)
+        k += 1
 
     while j < len(right):
-        result.append(right[j])
+        arr[k] = right[j]
+        record(SET, k, arr[k])
         j += 1
-        print(f"  Partial merged list: {result}")
-        time.sleep(delay)
+        k += 1
 
-    print(f"Result after merge: {result}\n")
-    time.sleep(delay)
-    return result
+
+def merge_sort_bottom_up(arr, trace=None):
+    """In-place bottom-up merge sort: runs of width 1, 2, 4, ... merged through one reusable buffer"""
+    record = recorder(trace)
+    n = len(arr)
+    buffer = [None] * n
+    width = 1
+    while width < n:
+        for lo in range(0, n - width, 2 * width):
+            mid = lo + width
+            hi = min(lo + 2 * width, n)
+            record(COMPARE, mid - 1, mid)
+            if arr[mid - 1] <= arr[mid]:
+                continue  # runs already in order
+            _merge_through_buffer(arr, buffer, lo, mid, hi, record)
+        width *= 2
+    return arr
+
+def _merge_through_buffer(arr, buffer, lo, mid, hi, record):
+    # Only the left run moves out; writes never overtake the unread part of the right run
+    record(MERGE, lo, hi)
+    size = mid - lo
+    for i in range(size):
+        buffer[i] = arr[lo + i]  # element by element: a slice would allocate a new list per merge
+    i, j, k = 0, mid, lo
+    while i < size and j < hi:
+        if arr[j] < buffer[i]:
+            arr[k] = arr[j]
+            j += 1
+        else:
+            arr[k] = buffer[i]
+            i += 1
+        record(SET, k, arr[k])
+        k += 1
+    while i < size:
+        arr[k] = buffer[i]
+        record(SET, k, arr[k])
+        i += 1
+        k += 1
 
 
-def quick_sort(arr):
-    print(f"Running quick_sort on list: {arr}\n")
-    time.sleep(1)
-    if len(arr) <= 1:
+def quick_sort(arr, trace=None, lo=0, hi=None):
+    """In-place quick sort of arr[lo:hi]: three-way partition around the middle element"""
+    record = recorder(trace)
+    if hi is None:
+        hi = len(arr)
+    if hi - lo <= 1:
         return arr
-    pivot = arr[len(arr)//2]
-    left = [x for x in arr if x < pivot]
-    middle = [x for x in arr if x == pivot]
-    right = [x for x in arr if x > pivot]
-    return quick_sort(left) + middle + quick_sort(right)
+
+    record(PARTITION, lo, hi)
+    pivot = arr[lo + (hi - lo) // 2]
+    record(SELECT, lo + (hi - lo) // 2, pivot)
+    lt, i, gt = lo, lo, hi
+    while i < gt:
+        record(COMPARE, i, -1)
+        if arr[i] < pivot:
+            if lt != i:
+                arr[lt], arr[i] = arr[i], arr[lt]
+                record(SWAP, lt, i)
+            lt += 1
+            i += 1
+        elif arr[i] > pivot:
+            gt -= 1
+            if gt != i:
+                arr[gt], arr[i] = arr[i], arr[gt]
+                record(SWAP, gt, i)
+        else:
+            i += 1
+    quick_sort(arr, trace, lo, lt)
+    quick_sort(arr, trace, gt, hi)
+    return arr
 
 
-def selection_sort(arr):
-    print(f"Running selection_sort on list: {arr}\n")
-    time.sleep(1)
+def quick_sort_iterative(arr, trace=None):
+    """In-place quick sort with an explicit stack, median-of-three pivot and Hoare partition"""
+    record = recorder(trace)
+    stack = [(0, len(arr) - 1)]
+    while stack:
+        lo, hi = stack.pop()
+        if lo >= hi:
+            continue
+        record(PARTITION, lo, hi + 1)
+
+        # Median-of-three: order arr[lo], arr[mid], arr[hi] so the median sits at mid
+        mid = (lo + hi) // 2
+        for x, y in ((lo, mid), (lo, hi), (mid, hi)):
+            record(COMPARE, x, y)
+            if arr[y] < arr[x]:
+                arr[x], arr[y] = arr[y], arr[x]
+                record(SWAP, x, y)
+        pivot = arr[mid]
+        record(SELECT, mid, pivot)
+
+        i, j = lo - 1, hi + 1
+        while True:
+            i += 1
+            record(COMPARE, i, -1)
+            while arr[i] < pivot:
+                i += 1
+                record(COMPARE, i, -1)
+            j -= 1
+            record(COMPARE, j, -1)
+            while arr[j] > pivot:
+                j -= 1
+                record(COMPARE, j, -1)
+            if i >= j:
+                break
+            arr[i], arr[j] = arr[j], arr[i]
+            record(SWAP, i, j)
+
+        # Push the larger side first so the smaller one is handled next: the stack stays O(log n)
+        if j - lo > hi - j - 1:
+            stack.append((lo, j))
+            stack.append((j + 1, hi))
+        else:
+            stack.append((j + 1, hi))
+            stack.append((lo, j))
+    return arr
+
+
+def selection_sort(arr, trace=None):
+    record = recorder(trace)
     for i in range (len(arr)-1):
         current_min = i
-        print(f"Current minimum: {arr[i]} at index {i}\n")
-        time.sleep(1)
         for j in range (i+1, len(arr)):
+            record(COMPARE, j, current_min)
             if arr[j] < arr[current_min]:
                 current_min = j
-        print(f"Selected minimum after traversal: {arr[current_min]} at index {current_min}")
-        time.sleep(1)
-        arr[i],arr[current_min] = arr[current_min],arr[i]
-        print(f"Updated list after swap: {arr}\n")
-        time.sleep(1)
+        record(SELECT, current_min, arr[current_min])
+        if current_min != i:
+            arr[i],arr[current_min] = arr[current_min],arr[i]
+            record(SWAP, i, current_min)
     return arr
 
-def insertion_sort(arr):
-    print(f"Running insertion_sort on list: {arr}\n")
-    time.sleep(1)
+def insertion_sort(arr, trace=None):
+    record = recorder(trace)
     for i in range(1, len(arr)):
         j = i
-        print(f"Inserting element at index {i-1}: {arr[i]}")
-        time.sleep(1)
-        while j > 0 and arr[j-1] > arr[j]:
-            print(f"{arr[j-1]} is greater than {arr[j]}. Shifting {arr[j-1]} to the right")
-            time.sleep(1)
+        record(SELECT, i, arr[i])
+        while j > 0:
+            record(COMPARE, j-1, j)
+            if arr[j-1] <= arr[j]:
+                break
             arr[j-1],arr[j] = arr[j],arr[j-1]
-            print(f"Updated list: {arr}")
-            time.sleep(1)
+            record(SWAP, j-1, j)
             j-=1
-        print(f"Placed {arr[j]} at index {j}, list now: {arr}\n")
-        time.sleep(1)
     return arr
 
 
-def run_algorithm(algo_name, arr):
-    algorithms = {
-        "bubble_sort": bubble_sort,
-        "merge_sort": merge_sort,
-        "quick_sort": quick_sort,
-        "selection_sort": selection_sort,
-        "insertion_sort": insertion_sort
-    }
-    if algo_name in algorithms:
-        sorted_arr = algorithms[algo_name](arr)
-        print(f"Sorted list: {sorted_arr}")
-    else:
+ALGORITHMS = {
+    "bubble_sort": bubble_sort,
+    "merge_sort": merge_sort,
+    "merge_sort_bottom_up": merge_sort_bottom_up,
+    "quick_sort": quick_sort,
+    "quick_sort_iterative": quick_sort_iterative,
+    "selection_sort": selection_sort,
+    "insertion_sort": insertion_sort
+}
+
+def run_algorithm(algo_name, arr, delay=1.0, json_path=None, save_path=None, start=0):
+    """Sort at full speed while recording a trace, then export and/or play it back from step `start`"""
+    if algo_name not in ALGORITHMS:
         print(f"Unknown algorithm: {algo_name}")
+        return None
+
+    trace = Trace(algo_name, arr)
+    sorted_arr = ALGORITHMS[algo_name](list(arr), trace)
+    if json_path == "-":
+        print(trace.to_json())
+        return trace
+    if json_path:
+        trace.save(json_path)
+    if save_path:
+        trace.save(save_path)
+
+    play(trace, delay, start=start)
+    print(f"Sorted list: {sorted_arr}")
+    return trace
     
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(prog="algoflow", description="AlgoFlow quicktime CLI Tool")
@@ -135,6 +247,16 @@ if __name__ == "__main__":
     run_parser = subparsers.add_parser("run", help="Run a specifc Algorithm")
     run_parser.add_argument("algorithm", help="Algorithm name") 
     run_parser.add_argument("numbers", nargs="*", type=int, help="List of numbers")
+    run_parser.add_argument("--delay", type=float, default=1.0, help="Seconds to pause between steps during playback (0 for none)")
+    run_parser.add_argument("--json", metavar="PATH", help="Also save the step trace as JSON, gzip'd if PATH ends in .gz ('-' prints it instead of playing it back)")
+    run_parser.add_argument("--save", metavar="PATH", help="Also save the step trace in the compact binary format (.trace)")
+    run_parser.add_argument("--start", type=int, default=0, help="Step to start playback from")
+
+    play_parser = subparsers.add_parser("play", help="Play back a saved trace")
+    play_parser.add_argument("trace_file", help="Trace saved with --json or --save")
+    play_parser.add_argument("--delay", type=float, default=1.0, help="Seconds to pause between steps (0 for none)")
+    play_parser.add_argument("--start", type=int, default=0, help="Step to start playback from")
+    play_parser.add_argument("--steps", type=int, help="Number of steps to play")
 
     args = parser.parse_args()
 
@@ -143,6 +265,9 @@ if __name__ == "__main__":
         if not nums:
             user_input = input("Enter numbers separated by spaces: ")
             nums = list(map(int, user_input.strip().split()))
-        run_algorithm(args.algorithm, nums)
+        run_algorithm(args.algorithm, nums, delay=args.delay, json_path=args.json, save_path=args.save, start=args.start)
+    elif args.command == "play":
+        trace = Trace.load(args.trace_file)
+        play(trace, args.delay, start=args.start, end=args.start + args.steps if args.steps else None)
     else:
         parser.print_help()
@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+Single-pass AST analysis of submissions, cached by source hash
+"""
+import ast
+import builtins
+import hashlib
+import threading
+from collections import OrderedDict
+
+CACHE_SIZE = 512
+
+LOOP_NODES = (ast.For, ast.AsyncFor, ast.While)
+
+
+# Nodes that bind names, and the field holding the value they bind them to
+BINDING_VALUE_FIELDS = {
+    ast.Assign: "value", ast.AnnAssign: "value", ast.AugAssign: "value", ast.NamedExpr: "value",
+    ast.For: "iter", ast.AsyncFor: "iter", ast.withitem: "context_expr",
+}
+
+
+def _names_in(node):
+    if node is None:
+        return set()
+    return {child.id for child in ast.walk(node) if isinstance(child, ast.Name)}
+
+
+class _Scope:
+    """Names bound in one module, class, function or comprehension body"""
+
+    def __init__(self, parent=None, is_class=False):
+        self.parent = parent
+        self.is_class = is_class
+        self.bound = set()
+        # Bound to a value computed from the same name, e.g. `min = min` or `sorted=sorted`,
+        # so the binding may well still be the builtin
+        self.tainted = set()
+        self.global_names = set()
+        self.nonlocal_names = set()
+
+    def module(self):
+        scope = self
+        while scope.parent:
+            scope = scope.parent
+        return scope
+
+    def lookup(self, name):
+        """Scope whose binding a load of name refers to; None means the builtin"""
+        if name in self.global_names:
+            module = self.module()
+            return module if name in module.bound else None
+        scope = self
+        while scope:
+            # Class bodies are not enclosing scopes for the functions defined in them
+            if name in scope.bound and (scope is self or not scope.is_class):
+                return scope
+            scope = scope.parent
+        return None
+
+
+class _Analyzer(ast.NodeVisitor):
+    def __init__(self):
+        self.loaded_names = set()
+        self.attributes = set()
+        self.imports = set()
+        self.loop_count = 0
+        self.comparison_count = 0
+        self.recursive_functions = set()
+        self._loop_depth = 0
+        self._functions = []
+        self._scope = _Scope()
+        self._loads = []
+        self._value_names = set()
+        # Builtins reached without loading their name: `from builtins import sorted as q`, `builtins.sorted`
+        self._builtins_by_module = set()
+        self._builtins_modules = {"__builtins__"}
+        # Per function (None for module level): deepest loop nesting in its own body, and the
+        # calls it makes by name together with the loop depth they are made at
+        self._own_depth = {None: 0}
+        self._calls = {None: []}
+
+    def max_loop_depth(self):
+        """Deepest loop nesting, counting loops in functions the code calls from inside its own loops"""
+        effective = {}
+
+        def depth(function, active):
+            if function in effective:
+                return effective[function]
+            best = self._own_depth[function]
+            for callee, call_depth in self._calls[function]:
+                # Recursion doesn't add depth; a call back into an active function is skipped
+                if callee in self._own_depth and callee not in active:
+                    best = max(best, call_depth + depth(callee, active | {callee}))
+            effective[function] = best
+            return best
+
+        return max(depth(function, {function}) for function in self._own_depth)
+
+    def builtins_used(self):
+        """Builtins the code refers to, unless every such reference is shadowed by a non-builtin value"""
+        builtin_names = set(dir(builtins))
+        used = set()
+        for scope, name in self._loads:
+            if name in builtin_names:
+                binding = scope.lookup(name)
+                if binding is None or name in binding.tainted:
+                    used.add(name)
+        return used | (self._builtins_by_module & builtin_names)
+
+    def _bind(self, name, tainted=False):
+        scope = self._scope
+        if name in scope.global_names:
+            scope = scope.module()
+        elif name in scope.nonlocal_names:
+            scope = scope.parent.lookup(name) or scope.parent
+        scope.bound.add(name)
+        if tainted:
+            scope.tainted.add(name)
+
+    def _in_scope(self, scope, nodes):
+        outer, self._scope = self._scope, scope
+        outer_value_names, self._value_names = self._value_names, set()
+        for node in nodes:
+            self.visit(node)
+        self._scope = outer
+        self._value_names = outer_value_names
+
+    def visit_Name(self, node):
+        if isinstance(node.ctx, ast.Load):
+            self.loaded_names.add(node.id)
+            self._loads.append((self._scope, node.id))
+            if self._functions and node.id == self._functions[-1]:
+                self.recursive_functions.add(node.id)
+        else:
+            self._bind(node.id, tainted=node.id in self._value_names)
+
+    def visit_Global(self, node):
+        self._scope.global_names.update(node.names)
+
+    def visit_Nonlocal(self, node):
+        self._scope.nonlocal_names.update(node.names)
+
+    def visit_Attribute(self, node):
+        self.attributes.add(node.attr)
+        if isinstance(node.value, ast.Name) and node.value.id in self._builtins_modules:
+            self._builtins_by_module.add(node.attr)
+        self.generic_visit(node)
+
+    def visit_Import(self, node):
+        for alias in node.names:
+            self.imports.add(alias.name.split(".")[0])
+            self._bind((alias.asname or alias.name).split(".")[0])
+            if alias.name == "builtins":
+                self._builtins_modules.add(alias.asname or alias.name)
+
+    def visit_ImportFrom(self, node):
+        if node.module:
+            self.imports.add(node.module.split(".")[0])
+        for alias in node.names:
+            self._bind(alias.asname or alias.name)
+            if node.module == "builtins":
+                self._builtins_by_module.add(alias.name)
+
+    def visit_Call(self, node):
+        if isinstance(node.func, ast.Name):
+            caller = self._functions[-1] if self._functions else None
+            self._calls[caller].append((node.func.id, self._loop_depth))
+        self.generic_visit(node)
+
+    def visit_Compare(self, node):
+        self.comparison_count += 1
+        self.generic_visit(node)
+
+    def _visit_arguments(self, args, scope):
+        """Defaults and annotations belong to the enclosing scope, the parameters to scope"""
+        positional = args.posonlyargs + args.args
+        defaults = dict(zip(positional[len(positional) - len(args.defaults):], args.defaults))
+        defaults.update((arg, default) for arg, default in zip(args.kwonlyargs, args.kw_defaults) if default)
+        every_arg = positional + [args.vararg] + args.kwonlyargs + [args.kwarg]
+        self._in_scope(self._scope, list(defaults.values()) +
+                       [arg.annotation for arg in every_arg if arg and arg.annotation])
+        for arg in every_arg:
+            if arg:
+                scope.bound.add(arg.arg)
+                if arg.arg in _names_in(defaults.get(arg)):
+                    scope.tainted.add(arg.arg)
+
+    def _visit_function(self, node):
+        self._bind(node.name)
+        self._in_scope(self._scope, node.decorator_list + ([node.returns] if node.returns else []))
+        scope = _Scope(self._scope)
+        self._visit_arguments(node.args, scope)
+        # Loop nesting is measured per function body, then combined across calls
+        outer_depth, self._loop_depth = self._loop_depth, 0
+        self._own_depth.setdefault(node.name, 0)
+        self._calls.setdefault(node.name, [])
+        self._functions.append(node.name)
+        self._in_scope(scope, node.body)
+        self._functions.pop()
+        self._loop_depth = outer_depth
+
+    visit_FunctionDef = _visit_function
+    visit_AsyncFunctionDef = _visit_function
+
+    def visit_Lambda(self, node):
+        scope = _Scope(self._scope)
+        self._visit_arguments(node.args, scope)
+        outer_depth, self._loop_depth = self._loop_depth, 0
+        self._in_scope(scope, [node.body])
+        self._loop_depth = outer_depth
+
+    def visit_ClassDef(self, node):
+        self._bind(node.name)
+        self._in_scope(self._scope, node.decorator_list + node.bases + node.keywords)
+        self._in_scope(_Scope(self._scope, is_class=True), node.body)
+
+    def _visit_comprehension_node(self, node):
+        scope = _Scope(self._scope)
+        outer_scope, outer_depth = self._scope, self._loop_depth
+        for i, generator in enumerate(node.generators):
+            if i == 0:
+                # The first iterable is evaluated in the enclosing scope, outside the comprehension
+                self.visit(generator.iter)
+                self._scope = scope
+            # Each generator nests inside the previous one, and the element inside them all
+            self._enter_loop()
+            outer_value_names, self._value_names = self._value_names, _names_in(generator.iter)
+            self.visit(generator.target)
+            self._value_names = outer_value_names
+            if i > 0:
+                self.visit(generator.iter)
+            for condition in generator.ifs:
+                self.visit(condition)
+        for field in ("elt", "key", "value"):
+            if hasattr(node, field):
+                self.visit(getattr(node, field))
+        self._scope, self._loop_depth = outer_scope, outer_depth
+
+    visit_ListComp = _visit_comprehension_node
+    visit_SetComp = _visit_comprehension_node
+    visit_DictComp = _visit_comprehension_node
+    visit_GeneratorExp = _visit_comprehension_node
+
+    def _enter_loop(self):
+        self.loop_count += 1
+        self._loop_depth += 1
+        function = self._functions[-1] if self._functions else None
+        self._own_depth[function] = max(self._own_depth[function], self._loop_depth)
+
+    # Loops have no visit_* method of their own, so every one of them passes through here
+    def generic_visit(self, node):
+        outer_value_names = self._value_names
+        if type(node) in BINDING_VALUE_FIELDS:
+            self._value_names = _names_in(getattr(node, BINDING_VALUE_FIELDS[type(node)]))
+        if isinstance(node, LOOP_NODES):
+            self._enter_loop()
+            super().generic_visit(node)
+            self._loop_depth -= 1
+        else:
+            super().generic_visit(node)
+        self._value_names = outer_value_names
+
+
+def _analyze(code):
+    try:
+        tree = ast.parse(code)
+    except SyntaxError as e:
+        return {"syntax_error": str(e)}
+
+    analyzer = _Analyzer()
+    analyzer.visit(tree)
+    return {
+        # Builtins the code actually refers to, whether called or aliased
+        "builtins_used": sorted(analyzer.builtins_used()),
+        "attributes_used": sorted(analyzer.attributes),
+        "imports": sorted(analyzer.imports),
+        "loop_count": analyzer.loop_count,
+        "max_loop_depth": analyzer.max_loop_depth(),
+        "comparison_count": analyzer.comparison_count,
+        "recursive_functions": sorted(analyzer.recursive_functions),
+    }
+
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+def analyze_source(code):
+    """Structure summary of a submission; identical source is only parsed once"""
+    key = hashlib.sha256(code.encode()).hexdigest()
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+
+    analysis = _analyze(code)
+    with _cache_lock:
+        _cache[key] = analysis
+        if len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return analysis
+
+
+# --- Per-problem structural rules ---
+def find_forbidden(analysis, forbidden):
+    """Entries of `forbidden` the code uses: ".name" means a method, "name" a builtin or module"""
+    found = []
+    for name in forbidden:
+        if name.startswith("."):
+            if name[1:] in analysis["attributes_used"]:
+                found.append(name)
+        elif name in analysis["builtins_used"] or name in analysis["imports"]:
+            found.append(name)
+    return found
+
+def check_rules(analysis, rules):
+    """Return a list of rule violations (empty when the submission is acceptable).
+
+    Supported rules, declared per problem under "rules" in problems.json:
+    forbid (list of names), min_loop_depth, max_loop_depth, require_recursion, forbid_loops.
+    """
+    if "syntax_error" in analysis:
+        return [f"Syntax error: {analysis['syntax_error']}"]
+
+    violations = []
+    forbidden = find_forbidden(analysis, rules.get("forbid", []))
+    if forbidden:
+        names = ", ".join(name if name in analysis["imports"] else f"{name}()" for name in forbidden)
+        violations.append(f"Forbidden function used ({names}). You must implement manually.")
+    if analysis["max_loop_depth"] < rules.get("min_loop_depth", 0):
+        violations.append(f"Solution needs at least {rules['min_loop_depth']} nested loops for this algorithm.")
+    if "max_loop_depth" in rules and analysis["max_loop_depth"] > rules["max_loop_depth"]:
+        violations.append(f"Solution nests loops deeper than {rules['max_loop_depth']} levels.")
+    if rules.get("forbid_loops") and analysis["loop_count"]:
+        violations.append("Loops are not allowed for this problem; use recursion.")
+    if rules.get("require_recursion") and not analysis["recursive_functions"]:
+        violations.append("Solution must be recursive.")
+    return violations
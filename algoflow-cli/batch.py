@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Batch grading: many submission files graded in parallel worker processes, reported as JSONL or CSV
+"""
+import csv
+import json
+import os
+import re
+import signal
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from utils import catalog, compile_solution
+from grader import grade
+from testgen import hidden_tests_for
+from sandbox import _limit_cpu
+
+# In directory mode every <algorithm>_<problem id>.py file below the root is a submission
+SUBMISSION_FILE = re.compile(r"^(?P<algorithm>[a-z_]+)_(?P<problem_id>\d+)\.py$")
+
+CSV_FIELDS = ["id", "algorithm", "problem_id", "status", "passed", "tests_passed", "tests_total", "time_ms", "error"]
+
+
+# --- Finding submissions ---
+def discover_submissions(source):
+    """Submissions from a directory tree, or from a .jsonl/.json/.csv manifest of {path, algorithm, problem_id}"""
+    if os.path.isdir(source):
+        submissions = []
+        for root, dirs, files in os.walk(source):
+            dirs.sort()
+            for name in sorted(files):
+                match = SUBMISSION_FILE.match(name)
+                if match and catalog.get_problem(match["algorithm"], match["problem_id"]):
+                    path = os.path.join(root, name)
+                    submissions.append({
+                        "id": os.path.relpath(path, source),
+                        "path": path,
+                        "algorithm": match["algorithm"],
+                        "problem_id": match["problem_id"],
+                    })
+        return submissions
+
+    with open(source, "r", newline="") as f:
+        if source.endswith(".csv"):
+            entries = list(csv.DictReader(f))
+        elif source.endswith(".json"):
+            entries = json.load(f)
+        else:
+            entries = [json.loads(line) for line in f if line.strip()]
+
+    base = os.path.dirname(os.path.abspath(source))
+    return [{
+        "id": entry.get("id") or entry["path"],
+        "path": os.path.join(base, entry["path"]),
+        "algorithm": entry["algorithm"],
+        "problem_id": str(entry["problem_id"]),
+    } for entry in entries]
+
+
+# --- Worker side ---
+def _init_worker(problem_keys, seed, hidden):
+    # Submissions may print; keep that out of a report being streamed to stdout
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    # Pre-warm once per worker: every forked job then starts with the catalog and suites in memory
+    for algorithm, problem_id in problem_keys:
+        problem = catalog.get_problem(algorithm, problem_id)
+        if problem and hidden:
+            hidden_tests_for(algorithm, problem, seed=seed)
+
+def grade_file(submission, seed=0, hidden=True, timeout=10):
+    """Grade one submission file and summarize it; never raises"""
+    record = {key: submission[key] for key in ("id", "algorithm", "problem_id")}
+    # Backstop for code the time budget can't interrupt (long C-level calls): the kernel kills the process
+    _limit_cpu(int(timeout or 0) + 5)
+    start = time.perf_counter()
+    problem = catalog.get_problem(submission["algorithm"], submission["problem_id"])
+    if not problem:
+        record.update(status="error", passed=False, error="Problem not found", results=[])
+        return record
+
+    try:
+        with open(submission["path"], "r") as f:
+            code = f.read()
+        solve_fn = compile_solution(code, submission["algorithm"], filename=submission["path"])
+        hidden_tests = hidden_tests_for(submission["algorithm"], problem, seed=seed) if hidden else []
+        results = grade(solve_fn, problem, hidden_tests=hidden_tests, source=code,
+                        total_time_limit_ms=timeout * 1000 if timeout else None, clock="cpu")
+    except Exception as e:
+        results = [{"error": f"Could not load your code: {type(e).__name__}: {e}"}]
+    except BaseException as e:
+        # SystemExit and the like from the submission end its grading, not the batch
+        results = [{"error": f"Your code stopped the grader: {type(e).__name__}: {e}"}]
+
+    tests = [r for r in results if "test" in r]
+    if any(r.get("status") == "timeout" for r in results):
+        status = "timeout"
+    elif len(tests) < len(results):
+        status = "error"  # rejected before any test ran
+    else:
+        status = "passed" if all(r["passed"] for r in tests) else "failed"
+
+    record.update(
+        status=status,
+        passed=status == "passed",
+        tests_passed=sum(1 for r in tests if r["passed"]),
+        tests_total=len(tests),
+        time_ms=round((time.perf_counter() - start) * 1000, 3),
+        error=next((r["error"] for r in results if r.get("error")), None),
+        results=results,
+    )
+    return record
+
+def grade_forked(submission, seed=0, hidden=True, timeout=10):
+    """Run grade_file in a child forked from this pre-warmed worker; a child that dies is reported as "crashed".
+
+    Nothing a submission patches or leaves running survives its child, so the worker
+    stays clean for the next one without paying for a fresh interpreter.
+    """
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os.close(read_fd)
+            with os.fdopen(write_fd, "w") as out:
+                out.write(json.dumps(grade_file(submission, seed, hidden, timeout), default=repr))
+        finally:
+            os._exit(0)
+
+    os.close(write_fd)
+    with os.fdopen(read_fd, "r") as reports:
+        report = reports.read()
+    # Threads the submission left running must not outlive its job
+    try:
+        os.kill(pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+    os.waitpid(pid, 0)
+    try:
+        return json.loads(report)
+    except ValueError:
+        return _crashed(submission)
+
+
+# --- Parent side ---
+def _crashed(submission):
+    record = {key: submission[key] for key in ("id", "algorithm", "problem_id")}
+    record.update(status="crashed", passed=False, results=[],
+                  error="Grader process died (CPU, memory or recursion limit)")
+    return record
+
+def _run_pool(submissions, workers, seed, hidden, timeout, on_done):
+    """Grade on one pool; returns the submissions whose futures died with the pool"""
+    lost = []
+    problem_keys = sorted({(s["algorithm"], s["problem_id"]) for s in submissions})
+    # Long-lived workers, one forked child per submission (see grade_forked)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(problem_keys, seed, hidden)) as pool:
+        futures = {pool.submit(grade_forked, s, seed, hidden, timeout): s for s in submissions}
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                submission = futures.pop(future)
+                try:
+                    on_done(future.result())
+                except BrokenProcessPool:
+                    lost.append(submission)
+    return lost
+
+def grade_batch(submissions, workers=None, seed=0, hidden=True, timeout=10, on_record=None):
+    """Grade submissions across a process pool, calling on_record as each one finishes.
+
+    Each submission runs in its own forked child, so one that dies is reported as
+    "crashed" without touching the pool. Should a worker itself die, the pool breaks
+    for everything in flight; those are re-run one at a time in a pool of their own.
+    """
+    if hidden:
+        # Build the suites once up front so workers only have to load them
+        for submission in submissions:
+            problem = catalog.get_problem(submission["algorithm"], submission["problem_id"])
+            if problem:
+                hidden_tests_for(submission["algorithm"], problem, seed=seed)
+
+    records = []
+
+    def finish(record):
+        records.append(record)
+        if on_record:
+            on_record(record)
+
+    for submission in _run_pool(submissions, workers, seed, hidden, timeout, finish):
+        if _run_pool([submission], 1, seed, hidden, timeout, finish):
+            finish(_crashed(submission))
+    return records
+
+
+# --- Reports ---
+class ReportWriter:
+    """Streams one line per finished submission: full JSONL records, or a CSV summary row"""
+
+    def __init__(self, stream, fmt="jsonl"):
+        self.stream = stream
+        self.fmt = fmt
+        if fmt == "csv":
+            self._csv = csv.DictWriter(stream, fieldnames=CSV_FIELDS, extrasaction="ignore")
+            self._csv.writeheader()
+
+    def write(self, record):
+        if self.fmt == "csv":
+            self._csv.writerow(record)
+        else:
+            self.stream.write(json.dumps(record, default=repr) + "\n")
+        self.stream.flush()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the reference algorithms and the grading pipeline, with run-to-run comparison
+"""
+import platform
+import random
+import time
+import tracemalloc
+
+from algoflow import ALGORITHMS
+from grader import grade
+from testgen import DISTRIBUTIONS, REFERENCES, gen_int_list
+from utils import PROBLEMS_FILE, ProblemCatalog, compile_solution
+
+DEFAULT_SIZES = (100, 1000, 10000)
+# O(n^2) algorithms stop here; past it a single run takes seconds
+QUADRATIC = {"bubble_sort", "selection_sort", "insertion_sort"}
+QUADRATIC_MAX_N = 2000
+
+# Known-good submissions for the grader benchmark, one per problem exercised
+SAMPLE_SOLUTIONS = {
+    ("bubble_sort", 1): """
+def solve(arr):
+    n = len(arr)
+    for i in range(n):
+        for j in range(n - 1 - i):
+            if arr[j] > arr[j + 1]:
+                arr[j], arr[j + 1] = arr[j + 1], arr[j]
+    return arr
+""",
+    ("merge_sort", 3): """
+def solve(arr):
+    if len(arr) <= 1:
+        return arr
+    mid = len(arr) // 2
+    left, right = solve(arr[:mid]), solve(arr[mid:])
+    merged, i, j = [], 0, 0
+    while i < len(left) and j < len(right):
+        if left[i] <= right[j]:
+            merged.append(left[i])
+            i += 1
+        else:
+            merged.append(right[j])
+            j += 1
+    return merged + left[i:] + right[j:]
+""",
+    ("quick_sort", 2): """
+def solve(arr):
+    if len(arr) <= 1:
+        return arr
+    pivot = arr[len(arr) // 2]
+    return solve([x for x in arr if x < pivot]) + [x for x in arr if x == pivot] + solve([x for x in arr if x > pivot])
+""",
+}
+
+
+# --- Measurement ---
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    ordered = sorted(samples)
+    rank = max(1, -(-pct * len(ordered) // 100))
+    return ordered[min(rank, len(ordered)) - 1]
+
+def measure(make_args, run, repeat):
+    """Time `repeat` calls of run(*make_args()), then one more under tracemalloc for the peak"""
+    latencies = []
+    for _ in range(repeat):
+        args = make_args()
+        start = time.perf_counter()
+        run(*args)
+        latencies.append(time.perf_counter() - start)
+
+    # Tracing slows allocation down, so memory gets its own untimed run
+    args = make_args()
+    tracemalloc.start()
+    try:
+        run(*args)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    mean = sum(latencies) / len(latencies)
+    return {
+        "runs": repeat,
+        "mean_ms": round(mean * 1000, 4),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 4),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 4),
+        "ops_per_sec": round(1 / mean, 2) if mean else None,
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+# --- Suites ---
+def bench_algorithms(sizes, distributions, repeat, seed=0):
+    results = []
+    for name, sort in ALGORITHMS.items():
+        for n in sizes:
+            if name in QUADRATIC and n > QUADRATIC_MAX_N:
+                continue
+            for distribution in distributions:
+                rng = random.Random(seed)
+                data = gen_int_list(n, distribution, rng)
+                stats = measure(lambda: (list(data),), sort, repeat)
+                results.append({"name": f"algorithm:{name}", "n": n, "distribution": distribution, **stats})
+    return results
+
+def _grade_end_to_end(algorithm, problem_id, code, hidden_tests):
+    problem = ProblemCatalog(PROBLEMS_FILE).get_problem(algorithm, problem_id)
+    solve_fn = compile_solution(code, "solve")
+    results = grade(solve_fn, problem, hidden_tests=hidden_tests, source=code)
+    if not all(r.get("passed") for r in results):
+        raise RuntimeError(f"Sample solution for {algorithm} {problem_id} failed its own benchmark")
+
+def bench_grader(sizes, distributions, repeat, seed=0):
+    """Problem load -> compile -> every test, with one generated hidden test of each size and distribution"""
+    results = []
+    for (algorithm, problem_id), code in SAMPLE_SOLUTIONS.items():
+        for n in sizes:
+            if algorithm in QUADRATIC and n > QUADRATIC_MAX_N:
+                continue
+            for distribution in distributions:
+                rng = random.Random(seed)
+                test_input = gen_int_list(n, distribution, rng)
+                hidden = [{"input": test_input, "output": REFERENCES["sort"](test_input), "hidden": True, "size": n}]
+                stats = measure(lambda: (algorithm, problem_id, code, hidden), _grade_end_to_end, repeat)
+                results.append({"name": f"grader:{algorithm}/{problem_id}", "n": n,
+                                "distribution": distribution, **stats})
+    return results
+
+def run_benchmarks(sizes=DEFAULT_SIZES, distributions=DISTRIBUTIONS, repeat=5, suites=("algorithms", "grader")):
+    """Full benchmark report as a JSON-serializable dict"""
+    results = []
+    if "algorithms" in suites:
+        results += bench_algorithms(sizes, distributions, repeat)
+    if "grader" in suites:
+        results += bench_grader(sizes, distributions, repeat)
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+# --- Comparison ---
+def compare_reports(baseline, current, threshold=0.20, metrics=("p50_ms", "peak_kb")):
+    """Pair up results by (name, n, distribution) and flag metrics that grew by more than threshold.
+
+    p99 is reported but not flagged by default: with a handful of runs it is just the slowest one.
+    """
+    previous = {(r["name"], r["n"], r["distribution"]): r for r in baseline["results"]}
+    rows = []
+    for result in current["results"]:
+        key = (result["name"], result["n"], result["distribution"])
+        before = previous.get(key)
+        if not before:
+            continue
+        row = {"name": key[0], "n": key[1], "distribution": key[2], "regressions": []}
+        for metric in ("p50_ms", "p99_ms", "peak_kb"):
+            old, new = before.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            ratio = new / old
+            row[metric] = {"baseline": old, "current": new, "ratio": round(ratio, 3)}
+            if ratio > 1 + threshold and metric in metrics:
+                row["regressions"].append(metric)
+        rows.append(row)
+    return {
+        "threshold": threshold,
+        "compared": len(rows),
+        "regressions": sum(1 for row in rows if row["regressions"]),
+        "rows": rows,
+    }
@@ -1,7 +1,19 @@
 #!/usr/bin/env python3
 import argparse
-from utils import load_problems, list_problems_for_algorithm, get_problem, load_user_solution, format_problem
+import json
+import sys
+import time
+from utils import catalog, load_user_solution
 from grader import grade
+from complexity import check_complexity
+from testgen import hidden_tests_for
+from resultcache import CACHE_FILE, ResultCache, is_cacheable
+from benchmark import DEFAULT_SIZES, DISTRIBUTIONS, compare_reports, run_benchmarks
+from batch import ReportWriter, discover_submissions, grade_batch
+
+def format_counts(res):
+    counts = res.get("counts")
+    return ", " + ", ".join(f"{name}={value}" for name, value in counts.items()) if counts else ""
 
 def main():
     parser = argparse.ArgumentParser(description="AlgoFlow CLI Tool")
@@ -16,12 +28,36 @@ def main():
     run_parser.add_argument("algorithm", help="Algorithm name")
     run_parser.add_argument("problem_id", help="Problem ID (e.g., 1, 2)")
     run_parser.add_argument("solution_file", help="Path to your solution.py file")
+    run_parser.add_argument("--no-hidden", action="store_true", help="Only run the visible examples")
+    run_parser.add_argument("--seed", type=int, default=0, help="Seed for the generated hidden tests")
+    run_parser.add_argument("--complexity", action="store_true", help="Also benchmark growing inputs and check the problem's complexity target")
+    run_parser.add_argument("--no-cache", action="store_true", help="Grade again even if this exact code was graded before")
+
+    # Benchmark reference algorithms and the grader
+    bench_parser = subparsers.add_parser("benchmark", help="Benchmark the reference algorithms and the grading pipeline")
+    bench_parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="Input sizes to run")
+    bench_parser.add_argument("--distributions", nargs="+", default=list(DISTRIBUTIONS), choices=DISTRIBUTIONS)
+    bench_parser.add_argument("--suites", nargs="+", default=["algorithms", "grader"], choices=["algorithms", "grader"])
+    bench_parser.add_argument("--repeat", type=int, default=5, help="Timed runs per case")
+    bench_parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    bench_parser.add_argument("--compare", nargs="+", metavar="REPORT",
+                              help="Compare against a baseline report: BASELINE [CURRENT]; without CURRENT a fresh run is used")
+    bench_parser.add_argument("--threshold", type=float, default=0.20, help="Relative growth in p50 latency or peak memory that counts as a regression")
+
+    # Grade many submissions at once
+    batch_parser = subparsers.add_parser("grade-batch", help="Grade a directory or manifest of submissions in parallel")
+    batch_parser.add_argument("source", help="Directory of <algorithm>_<id>.py files, or a .jsonl/.json/.csv manifest")
+    batch_parser.add_argument("--output", help="Report file (.csv for CSV, anything else for JSONL); default stdout")
+    batch_parser.add_argument("--format", choices=["jsonl", "csv"], help="Report format when it can't be told from --output")
+    batch_parser.add_argument("--workers", type=int, help="Worker processes (default: one per CPU)")
+    batch_parser.add_argument("--timeout", type=float, default=10, help="Seconds of test time allowed per submission")
+    batch_parser.add_argument("--no-hidden", action="store_true", help="Only run the visible examples")
+    batch_parser.add_argument("--seed", type=int, default=0, help="Seed for the generated hidden tests")
 
     args = parser.parse_args()
-    problems = load_problems()
 
     if args.command == "list":
-        problems_for_algo = list_problems_for_algorithm(problems, args.algorithm)
+        problems_for_algo = catalog.list_problems_for_algorithm(args.algorithm)
         if not problems_for_algo:
             print(f"No problems found for {args.algorithm}")
         else:
@@ -29,28 +65,104 @@ def main():
                 print(f"{problem['id']}: {problem['title']}")
 
     elif args.command == "run":
-        problem = get_problem(problems, args.algorithm, args.problem_id)
+        problem = catalog.get_problem(args.algorithm, args.problem_id)
         if not problem:
             print(f"Problem {args.problem_id} not found for {args.algorithm}")
             return
 
-        print("\n" + format_problem(problem))
+        print("\n" + catalog.format_problem(problem))
 
-        solve_fn = load_user_solution(args.solution_file, args.algorithm)
-        results = grade(solve_fn, problem, solution_file=args.solution_file)
+        with open(args.solution_file, "r") as f:
+            source = f.read()
+        cache = None if args.no_cache else ResultCache(path=CACHE_FILE)
+        cache_key = cache.key(source, args.algorithm, args.problem_id,
+                              {"hidden": not args.no_hidden, "seed": args.seed}) if cache else None
+        response = cache.get(cache_key) if cache_key else None
+
+        solve_fn = None
+        if response is None:
+            solve_fn = load_user_solution(args.solution_file, args.algorithm)
+            hidden_tests = [] if args.no_hidden else hidden_tests_for(args.algorithm, problem, seed=args.seed)
+            response = {"results": grade(solve_fn, problem, hidden_tests=hidden_tests, source=source)}
+            if cache_key and is_cacheable(response):
+                cache.put(cache_key, response)
+                cache.save()
+        else:
+            print("(unchanged code: showing cached results, use --no-cache to grade again)")
+        results = response["results"]
 
         for res in results:
             if res.get("passed"):
-                if "swaps" in res:
-                    print(f"[PASS] Test {res['test']}: swaps={res['swaps']} → output={res['output']}")
+                if res.get("hidden"):
+                    print(f"[PASS] Test {res['test']}: hidden, n={res['size']}{format_counts(res)}")
+                elif "counts" in res:
+                    print(f"[PASS] Test {res['test']}: output={res['output']}{format_counts(res)}")
                 else:
                     print(f"[PASS] Test {res['test']}: output={res['output']}")
             else:
                 err_msg = res.get("error")
-                if err_msg:
-                    print(f"[ERROR] Test {res['test']}: {err_msg}")
+                label = f"Test {res['test']}" if "test" in res else "Solution"
+                if res.get("status") == "timeout":
+                    print(f"[TIMEOUT] {label}: {err_msg}")
+                elif err_msg:
+                    print(f"[ERROR] {label}: {err_msg}")
+                elif res.get("hidden"):
+                    print(f"[FAIL] {label}: wrong answer on hidden test, n={res['size']}")
                 else:
                     print(f"[FAIL] Test {res['test']}: input={res['input']} → expected={res['expected']}, got={res['output']}")
 
+        if args.complexity:
+            solve_fn = solve_fn or load_user_solution(args.solution_file, args.algorithm)
+        if args.complexity and solve_fn:
+            report = check_complexity(solve_fn, problem)
+            if "estimated" in report:
+                status = "PASS" if report["passed"] else "FAIL"
+                print(f"[{status}] Complexity: estimated {report['estimated']} (slope {report['slope']}), target {report['target']}")
+            else:
+                print(f"[FAIL] Complexity: {report['error']}")
+
+    elif args.command == "benchmark":
+        if args.compare and len(args.compare) > 1:
+            with open(args.compare[1], "r") as f:
+                report = json.load(f)
+        else:
+            report = run_benchmarks(args.sizes, args.distributions, args.repeat, args.suites)
+
+        if args.compare:
+            with open(args.compare[0], "r") as f:
+                baseline = json.load(f)
+            report = compare_reports(baseline, report, args.threshold)
+            for row in report["rows"]:
+                if row["regressions"]:
+                    changes = ", ".join(f"{m} x{row[m]['ratio']}" for m in row["regressions"])
+                    print(f"[REGRESSION] {row['name']} n={row['n']} {row['distribution']}: {changes}", file=sys.stderr)
+            print(f"{report['regressions']} of {report['compared']} cases regressed", file=sys.stderr)
+
+        output = json.dumps(report, indent=2)
+        if args.output:
+            with open(args.output, "w") as f:
+                f.write(output + "\n")
+        else:
+            print(output)
+        if args.compare and report["regressions"]:
+            sys.exit(1)
+
+    elif args.command == "grade-batch":
+        submissions = discover_submissions(args.source)
+        fmt = args.format or ("csv" if args.output and args.output.endswith(".csv") else "jsonl")
+        stream = open(args.output, "w", newline="") if args.output else sys.stdout
+        try:
+            writer = ReportWriter(stream, fmt)
+            start = time.perf_counter()
+            records = grade_batch(submissions, workers=args.workers, seed=args.seed, hidden=not args.no_hidden,
+                                  timeout=args.timeout, on_record=writer.write)
+        finally:
+            if args.output:
+                stream.close()
+        elapsed = time.perf_counter() - start
+        passed = sum(1 for r in records if r["passed"])
+        print(f"Graded {len(records)} submissions in {elapsed:.1f}s ({len(records) / elapsed if elapsed else 0:.1f}/s): "
+              f"{passed} passed, {len(records) - passed} did not", file=sys.stderr)
+
 if __name__ == "__main__":
     main()
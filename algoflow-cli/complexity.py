@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Empirical complexity check: time solve() on growing inputs and fit the growth curve
+"""
+import math
+import random
+import time
+
+from grader import BudgetExceeded, call_with_budget
+
+# Candidate classes from slowest-growing to fastest; the order doubles as the ranking
+COMPLEXITY_CLASSES = [
+    ("O(1)", lambda n: 1.0),
+    ("O(log n)", lambda n: math.log2(n)),
+    ("O(n)", lambda n: float(n)),
+    ("O(n log n)", lambda n: n * math.log2(n)),
+    ("O(n^2)", lambda n: float(n) ** 2),
+    ("O(n^3)", lambda n: float(n) ** 3),
+]
+CLASS_RANK = {name: rank for rank, (name, _) in enumerate(COMPLEXITY_CLASSES)}
+
+INPUT_GENERATORS = {
+    "int_list": lambda n, rng: rng.choices(range(-10**6, 10**6 + 1), k=n),
+    "flag_list": lambda n, rng: rng.choices((0, 1, 2), k=n),
+}
+
+DEFAULT_SIZES = (100, 300, 1000, 3000, 10000, 30000, 100000)
+
+# Most input elements a batch may hold at once: batch * n stays well inside a worker's RLIMIT_AS
+MAX_BATCH_ELEMENTS = 1 << 20
+
+
+# --- Timing ---
+def time_call(user_function, make_input, min_batch_seconds=0.02, repeats=3, budget_seconds=None, input_size=1):
+    """Best-of-`repeats` seconds per call, batching calls so each sample lasts at least min_batch_seconds.
+
+    Inputs are built before the clock starts so only the user's code is measured; a batch
+    holds at most MAX_BATCH_ELEMENTS elements in total across inputs of input_size each.
+    """
+    max_batch = max(1, min(1024, MAX_BATCH_ELEMENTS // max(input_size, 1)))
+    batch = 1
+    while True:
+        inputs = [make_input() for _ in range(batch)]
+        start = time.perf_counter()
+        for arg in inputs:
+            call_with_budget(user_function, arg, budget_seconds)
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_batch_seconds or batch >= max_batch:
+            break
+        batch = min(batch * 4, max_batch)
+
+    # Slow sizes are already well above timer noise; don't pay for them twice
+    if elapsed >= 0.25:
+        return elapsed / batch
+
+    best = elapsed / batch
+    for _ in range(repeats - 1):
+        inputs = [make_input() for _ in range(batch)]
+        start = time.perf_counter()
+        for arg in inputs:
+            call_with_budget(user_function, arg, budget_seconds)
+        best = min(best, (time.perf_counter() - start) / batch)
+    return best
+
+
+# --- Curve fitting ---
+def fit_complexity(samples):
+    """Pick the class whose n -> f(n) shape best explains the timings.
+
+    For the right class, time / f(n) is roughly constant, so the class with the
+    smallest spread of log(time / f(n)) wins. Also returns the log-log slope.
+    """
+    best_name, best_spread = None, None
+    for name, f in COMPLEXITY_CLASSES:
+        ratios = [math.log(t) - math.log(f(n)) for n, t in samples]
+        mean = sum(ratios) / len(ratios)
+        spread = sum((r - mean) ** 2 for r in ratios) / len(ratios)
+        if best_spread is None or spread < best_spread:
+            best_name, best_spread = name, spread
+
+    xs = [math.log(n) for n, _ in samples]
+    ys = [math.log(t) for _, t in samples]
+    x_mean, y_mean = sum(xs) / len(xs), sum(ys) / len(ys)
+    slope = sum((x - x_mean) * (y - y_mean) for x, y in zip(xs, ys)) / sum((x - x_mean) ** 2 for x in xs)
+    return best_name, slope
+
+
+# --- Entry point used by the grader pipeline ---
+def check_complexity(user_function, problem, sizes=DEFAULT_SIZES, seed=0, total_seconds=5.0, per_size_seconds=2.0):
+    """Benchmark user_function against the problem's "complexity" declaration.
+
+    The declaration in problems.json looks like {"target": "O(n log n)", "input": "int_list"}.
+    Sizes are tried in increasing order until one runs past per_size_seconds or the whole
+    check passes total_seconds; at least three sizes are needed for a verdict.
+    """
+    spec = problem.get("complexity")
+    if not spec:
+        return {"error": "This problem does not declare a complexity target"}
+
+    target = spec["target"]
+    generate = INPUT_GENERATORS[spec.get("input", "int_list")]
+    rng = random.Random(seed)
+
+    # Warm-up: first call pays for lazy imports, caches and allocator growth
+    try:
+        call_with_budget(user_function, generate(sizes[0], rng), per_size_seconds)
+    except BudgetExceeded:
+        return {"target": target, "passed": False,
+                "error": f"Solution took over {per_size_seconds:g} s on the warm-up input (n={sizes[0]})"}
+    except Exception as e:
+        return {"target": target, "passed": False, "error": f"Solution failed during warm-up: {type(e).__name__}: {e}"}
+
+    samples = []
+    deadline = time.perf_counter() + total_seconds
+    for n in sizes:
+        if time.perf_counter() > deadline:
+            break
+        try:
+            seconds = time_call(user_function, lambda: generate(n, rng), budget_seconds=per_size_seconds,
+                                input_size=n)
+        except BudgetExceeded:
+            break
+        except Exception as e:
+            return {"target": target, "passed": False, "error": f"Solution failed at n={n}: {type(e).__name__}: {e}"}
+        samples.append((n, max(seconds, 1e-9)))
+        if seconds > per_size_seconds:
+            break
+
+    report = {
+        "target": target,
+        "samples": [{"n": n, "time_ms": round(t * 1000, 4)} for n, t in samples],
+    }
+    if len(samples) < 3:
+        report.update(passed=False, error="Too slow to time at enough input sizes")
+        return report
+
+    estimate, slope = fit_complexity(samples)
+    report.update(
+        estimated=estimate,
+        slope=round(slope, 3),
+        passed=CLASS_RANK[estimate] <= CLASS_RANK[target],
+    )
+    return report
@@ -1,86 +1,198 @@
 #!/usr/bin/env python3
-import ast
-
-# --- Helper: check for forbidden calls ---
-def uses_forbidden_calls(solution_file, forbidden=("sorted", ".sort")):
-    with open(solution_file, "r") as f:
-        code = f.read()
-    return any(fword in code for fword in forbidden)
-
-# --- Helper: check if code resembles bubble sort ---
-def looks_like_bubble_sort(solution_file):
-    """Lightweight AST check: must have nested loops + comparisons"""
-    with open(solution_file, "r") as f:
-        tree = ast.parse(f.read())
-    loops = [node for node in ast.walk(tree) if isinstance(node, ast.For)]
-    comparisons = [node for node in ast.walk(tree) if isinstance(node, ast.Compare)]
-    return len(loops) >= 2 and len(comparisons) > 0
+import contextlib
+import copy
+import signal
+import threading
+import time
+
+from analysis import analyze_source, check_rules
+from instrument import Instrumentation
+
+# --- Helper: give the user's code its own copy of a test input ---
+def copy_input(value):
+    # Flat lists (the common case) only need a slice; nested inputs need a deep copy
+    if isinstance(value, list) and not any(isinstance(x, (list, dict)) for x in value[:1]):
+        return value[:]
+    return copy.deepcopy(value)
+
+# Counting runs in Python on every write or call, so only inputs up to this size are verified;
+# a count that disagrees with the code's operations already shows up on small inputs
+VERIFY_MAX_SIZE = 100
+
+# --- Helper: run one test under a time budget ---
+# BaseException, so an `except Exception` in the user's code can't swallow the timer
+class BudgetExceeded(BaseException):
+    pass
+
+def _raise_budget_exceeded(signum, frame):
+    raise BudgetExceeded()
+
+def call_with_budget(user_function, arg, seconds, clock="wall"):
+    """Call user_function(arg), interrupting it after `seconds` of wall-clock or CPU time.
+
+    Interruption needs interval timers and the main thread; elsewhere the call runs to
+    completion and the caller compares the elapsed time against the budget afterwards.
+    """
+    if not seconds or not hasattr(signal, "setitimer") or threading.current_thread() is not threading.main_thread():
+        return user_function(arg)
+
+    if clock == "cpu":
+        timer, signum = signal.ITIMER_PROF, signal.SIGPROF
+    else:
+        timer, signum = signal.ITIMER_REAL, signal.SIGALRM
+
+    previous_handler = signal.signal(signum, _raise_budget_exceeded)
+    signal.setitimer(timer, seconds)
+    try:
+        return user_function(arg)
+    finally:
+        signal.setitimer(timer, 0)
+        signal.signal(signum, previous_handler)
 
 # --- Grading function ---
-def grade(user_function, problem, hidden_tests=None, solution_file=None):
+def grade(user_function, problem, hidden_tests=None, solution_file=None, on_result=None,
+          time_limit_ms=None, total_time_limit_ms=None, clock="wall", source=None):
+    """Run every test case and return one result dict per test.
+
+    The submission's source (given directly, or read from solution_file) is first checked
+    against the problem's structural "rules" from problems.json. time_limit_ms bounds each
+    test and total_time_limit_ms the whole run; both default to the problem's own
+    "time_limit_ms" / "total_time_limit_ms" entries. clock picks whether budgets count
+    wall-clock ("wall") or CPU ("cpu") time.
+
+    Problems with an "instrument" entry, e.g. {"verify": "swaps"}, have that one operation
+    counted on tests up to VERIFY_MAX_SIZE elements and require the returned number to match
+    it; with "exact": false the returned number may not exceed it.
+    """
     if not user_function:
         return [{"error": "Solution function not found"}]
 
-    problem_title = problem.get("title", "").lower()
+    # Structural checks: forbidden calls, loop nesting, recursion
+    rules = problem.get("rules")
+    instrument = problem.get("instrument")
+    verify = instrument and instrument.get("verify")
+    if (rules or verify == "partitions") and source is None and solution_file:
+        with open(solution_file, "r") as f:
+            source = f.read()
+    analysis = analyze_source(source) if source is not None and (rules or verify == "partitions") else None
+    if rules and analysis is not None:
+        violations = check_rules(analysis, rules)
+        if violations:
+            return [{"error": " ".join(violations)}]
 
-    # Forbidden call / AST check for bubble sort
-    if "bubble sort" in problem_title and solution_file:
-        if uses_forbidden_calls(solution_file):
-            return [{"error": "Forbidden function used (sorted() or .sort()). You must implement manually."}]
-        if not looks_like_bubble_sort(solution_file):
-            return [{"error": "Solution does not appear to implement bubble sort (missing nested loops or comparisons)."}]
+    # "partitions" are calls of the submission's recursive functions (or of solve itself)
+    recursive_functions = (analysis and analysis.get("recursive_functions")) or [user_function.__name__]
 
     test_cases = problem.get("examples", []) + (hidden_tests or [])
     results = []
 
+    def record(result, test_case):
+        if test_case.get("hidden"):
+            # Hidden inputs are large and meant to stay secret: report the verdict, not the data
+            for key in ("input", "output", "expected"):
+                result.pop(key, None)
+            result.update(hidden=True, size=test_case.get("size"))
+        # on_result lets callers stream each test result as soon as it is ready
+        results.append(result)
+        if on_result:
+            on_result(result)
+
+    # An explicit 0 turns a limit off; only None falls back to the problem's own
+    per_test_ms = time_limit_ms if time_limit_ms is not None else problem.get("time_limit_ms")
+    total_ms = total_time_limit_ms if total_time_limit_ms is not None else problem.get("total_time_limit_ms")
+    budget_clock = time.process_time if clock == "cpu" else time.perf_counter
+    spent_ms = 0
+
     for i, test_case in enumerate(test_cases, start=1):
-        input_copy = test_case["input"][:]
+        input_copy = copy_input(test_case["input"])
 
-        try:
-            if "count swaps" in problem_title:
-                # Track swaps
-                swap_count = {"count": 0}
-
-                class TrackList(list):
-                    def __setitem__(self, idx, value):
-                        if 0 <= idx < len(self) - 1 and self[idx] != value:
-                            swap_count["count"] += 1
-                        super().__setitem__(idx, value)
-
-                tracked = TrackList(input_copy)
-                user_output = user_function(tracked)
-                expected_output = test_case["output"]
-                passed = user_output == expected_output
-
-                results.append({
-                    "test": i,
-                    "input": test_case["input"],
-                    "output": user_output,
-                    "expected": expected_output,
-                    "passed": passed,
-                    "swaps": swap_count["count"]
-                })
-            else:
-                # Default: just compare output
-                user_output = user_function(input_copy)
-                expected_output = test_case["output"]
-                passed = user_output == expected_output
-
-                results.append({
+        budget_ms = per_test_ms
+        if total_ms:
+            remaining_ms = total_ms - spent_ms
+            if remaining_ms <= 0:
+                record({
                     "test": i,
                     "input": test_case["input"],
-                    "output": user_output,
-                    "expected": expected_output,
-                    "passed": passed
-                })
+                    "expected": test_case.get("output"),
+                    "passed": False,
+                    "status": "timeout",
+                    "error": f"Total time budget of {total_ms} ms used up before this test ran",
+                    "time_ms": 0
+                }, test_case)
+                continue
+            budget_ms = min(budget_ms, remaining_ms) if budget_ms else remaining_ms
 
+        extra = {}
+        if verify and len(input_copy) <= VERIFY_MAX_SIZE:
+            # Count the verified operation; the wrapper is undone before comparing output
+            tracker = Instrumentation(verify, recursive_functions, user_function.__code__.co_filename)
+            user_input = tracker.wrap(input_copy)
+        else:
+            # Default: just compare output
+            tracker = None
+            user_input = input_copy
+
+        start = time.perf_counter()
+        budget_start = budget_clock()
+        try:
+            with tracker or contextlib.nullcontext():
+                user_output = call_with_budget(user_function, user_input,
+                                               budget_ms / 1000 if budget_ms else None, clock)
+            error = None
+        except BudgetExceeded as e:
+            error = e
         except Exception as e:
-            results.append({
+            error = e
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        budget_used_ms = (budget_clock() - budget_start) * 1000
+        spent_ms += budget_used_ms
+
+        if tracker:
+            extra["counts"] = tracker.counts()
+            if "swaps" in extra["counts"]:
+                extra["swaps"] = extra["counts"]["swaps"]
+
+        if isinstance(error, BudgetExceeded) or (budget_ms and budget_used_ms > budget_ms):
+            record({
+                "test": i,
+                "input": test_case["input"],
+                "expected": test_case.get("output"),
+                "passed": False,
+                "status": "timeout",
+                "error": f"Time limit exceeded ({budget_ms:.0f} ms)",
+                "time_ms": round(elapsed_ms, 3)
+            }, test_case)
+        elif error is not None:
+            record({
                 "test": i,
                 "input": test_case["input"],
-                "output": str(e),
+                "output": str(error),
                 "expected": test_case.get("output"),
-                "passed": False
-            })
+                "passed": False,
+                "error": f"{type(error).__name__}: {error}",
+                "time_ms": round(elapsed_ms, 3)
+            }, test_case)
+        else:
+            if tracker:
+                user_output = tracker.unwrap(user_output)
+            expected_output = test_case["output"]
+            passed = user_output == expected_output
+            if passed and tracker and tracker.touched():
+                # The right number, but not one the code's own operations add up to;
+                # solutions that work on a copy of the input can't be checked this way
+                performed = extra["counts"].get(verify)
+                exact = instrument.get("exact", True)
+                if (exact and user_output != performed) or user_output > performed:
+                    passed = False
+                    extra["error"] = f"Returned {user_output} but the solution performed {performed} {verify}"
+            record({
+                "test": i,
+                "input": test_case["input"],
+                "output": user_output,
+                "expected": expected_output,
+                "passed": passed,
+                **extra,
+                "time_ms": round(elapsed_ms, 3)
+            }, test_case)
 
     return results
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Operation counting for grading: the one operation a problem's "verify" entry checks a returned count against
+"""
+import sys
+
+
+class CountingList(list):
+    """list that counts indexed writes, and recognises two writes that form a swap.
+
+    A swap is a write of the object that was just overwritten elsewhere, into a slot
+    still holding the object written there, e.g. `a[i], a[j] = a[j], a[i]`. Objects are
+    matched by identity so counting never triggers element comparisons. Reads are
+    plain list reads, so only writes pay for the counting.
+    """
+    __slots__ = ("writes", "swaps", "_last_write")
+
+    def __init__(self, values=()):
+        super().__init__(values)
+        self.writes = 0
+        self.swaps = 0
+        self._last_write = None
+
+    def __setitem__(self, index, value):
+        if type(index) is slice:
+            value = list(value)
+            self.writes += len(value)
+            self._last_write = None
+            list.__setitem__(self, index, value)
+            return
+
+        if index < 0:
+            index += len(self)
+        old = list.__getitem__(self, index)
+        last = self._last_write
+        self.writes += 1
+        if last is not None and last[0] != index and value is last[1] and old is last[2]:
+            self.swaps += 1
+            self._last_write = None
+        else:
+            self._last_write = (index, old, value)
+        list.__setitem__(self, index, value)
+
+
+class Instrumentation:
+    """Counts one operation while a solution runs on one test input.
+
+    "swaps" and "writes" are counted on the input list; "partitions" counts calls of the
+    submission's recursive functions, one per subarray they are handed.
+    """
+
+    def __init__(self, operation, recursive_functions=(), filename=None):
+        self.operation = operation
+        self.recursive_functions = set(recursive_functions)
+        self.filename = filename
+        self.tracked = None
+        self.calls = 0
+        self._previous_profile = None
+
+    def wrap(self, value):
+        if self.operation in ("swaps", "writes") and isinstance(value, list):
+            value = self.tracked = CountingList(value)
+        return value
+
+    def unwrap(self, value):
+        return list(value) if type(value) is CountingList else value
+
+    # Used as `with tracker:` around the solution call; only "partitions" needs a hook
+    def __enter__(self):
+        if self.operation == "partitions" and self.recursive_functions:
+            self._previous_profile = sys.getprofile()
+            sys.setprofile(self._profile)
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.operation == "partitions" and self.recursive_functions:
+            sys.setprofile(self._previous_profile)
+        return False
+
+    def _profile(self, frame, event, arg):
+        if event == "call":
+            code = frame.f_code
+            if code.co_name in self.recursive_functions and code.co_filename == self.filename:
+                self.calls += 1
+
+    def touched(self):
+        """Whether the counted operation happened at all (solutions that sort a copy never touch the input)"""
+        if self.operation == "partitions":
+            return self.calls > 0
+        return self.tracked is not None and self.tracked.writes > 0
+
+    def counts(self):
+        if self.operation == "partitions":
+            return {"partitions": self.calls}
+        if self.tracked is None:
+            return {}
+        return {self.operation: getattr(self.tracked, self.operation)}
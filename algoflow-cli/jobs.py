@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Asynchronous grading jobs: submit now, poll or stream results later
+"""
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+
+from sandbox import get_pool
+
+
+class QueueFull(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, code, algorithm, problem_id, complexity=False):
+        self.id = uuid.uuid4().hex
+        self.code = code
+        self.algorithm = algorithm
+        self.problem_id = problem_id
+        self.complexity = complexity
+        self.status = "queued"
+        self.results = []
+        self.response = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self.changed = threading.Condition()
+
+    def add_result(self, result):
+        with self.changed:
+            self.results.append(result)
+            self.changed.notify_all()
+
+    def finish(self, response, status="done"):
+        with self.changed:
+            self.response = response
+            self.status = status
+            self.code = None
+            self.finished_at = time.time()
+            self.changed.notify_all()
+
+    def to_dict(self):
+        with self.changed:
+            return {
+                "job_id": self.id,
+                "status": self.status,
+                "algorithm": self.algorithm,
+                "problem_id": self.problem_id,
+                "results": list(self.results),
+                "response": self.response,
+            }
+
+
+class JobQueue:
+    """Bounded queue of grading jobs drained by one dispatcher thread per pool worker"""
+
+    def __init__(self, pool, max_pending=100, keep_seconds=600):
+        self.pool = pool
+        self.keep_seconds = keep_seconds
+        self._pending = queue.Queue(maxsize=max_pending)
+        self._jobs = {}
+        self._lock = threading.Lock()
+        for _ in range(pool.size):
+            threading.Thread(target=self._dispatch, daemon=True).start()
+
+    def _dispatch(self):
+        while True:
+            job = self._pending.get()
+            with job.changed:
+                job.status = "running"
+                job.changed.notify_all()
+            try:
+                response = self.pool.run(
+                    job.code, job.algorithm, job.problem_id,
+                    on_result=job.add_result, complexity=job.complexity
+                )
+                job.finish(response)
+            except Exception as e:
+                job.finish({"error": str(e)}, status="failed")
+
+    def _prune(self):
+        cutoff = time.time() - self.keep_seconds
+        with self._lock:
+            for job_id in [j.id for j in self._jobs.values() if j.finished_at and j.finished_at < cutoff]:
+                del self._jobs[job_id]
+
+    def submit(self, code, algorithm, problem_id, complexity=False):
+        """Queue a submission and return its Job; raises QueueFull when the backlog is at capacity"""
+        self._prune()
+        job = Job(code, algorithm, problem_id, complexity)
+        with self._lock:
+            self._jobs[job.id] = job
+        try:
+            self._pending.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                del self._jobs[job.id]
+            raise QueueFull(f"Grading queue is full ({self._pending.maxsize} pending jobs)")
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stream(self, job, heartbeat=15):
+        """Yield Server-Sent Events: one 'test' per result, then a final 'done'"""
+        sent = 0
+        while True:
+            with job.changed:
+                if sent == len(job.results) and job.finished_at is None:
+                    job.changed.wait(heartbeat)
+                new_results = job.results[sent:]
+                finished = job.finished_at is not None
+
+            for result in new_results:
+                yield f"event: test\ndata: {json.dumps(result, default=repr)}\n\n"
+            sent += len(new_results)
+
+            if finished:
+                yield f"event: done\ndata: {json.dumps(job.to_dict(), default=repr)}\n\n"
+                return
+            if not new_results:
+                yield ": keep-alive\n\n"
+
+
+_job_queue = None
+_job_queue_lock = threading.Lock()
+
+def get_job_queue(create=True):
+    """Shared job queue on top of the shared grader pool, bounded by GRADER_MAX_PENDING.
+
+    With create=False, returns None instead of starting the pool if nothing was submitted yet.
+    """
+    global _job_queue
+    if _job_queue is None and create:
+        with _job_queue_lock:
+            if _job_queue is None:
+                _job_queue = JobQueue(get_pool(), max_pending=int(os.environ.get("GRADER_MAX_PENDING", 100)))
+    return _job_queue
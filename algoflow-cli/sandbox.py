@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Pool of long-lived grader processes for running untrusted submissions.
+
+Each worker pre-warms once and then forks a fresh child per job, so nothing one
+submission does to the interpreter is visible to the next.
+"""
+import argparse
+import json
+import os
+import queue
+import select
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # Windows: no rlimits, wall-clock limit still applies
+    resource = None
+
+from utils import catalog, compile_solution
+from grader import grade
+from complexity import check_complexity
+from testgen import hidden_tests_for
+
+WORKER_SCRIPT = os.path.abspath(__file__)
+
+# The complexity check gets its own CPU allowance on top of grading's: up to 5 s of
+# sizes, one more size of up to 2 s, and a 2 s warm-up
+COMPLEXITY_CPU_SECONDS = 10
+COMPLEXITY_OUT_OF_TIME = {"passed": False, "error": "The complexity check ran out of CPU time and was stopped"}
+
+
+# --- Grading pipeline: compile once, then run every test ---
+def grade_submission(code, algorithm, problem_id, on_result=None, complexity=False, on_graded=None):
+    """Grade code against a catalog problem; on_graded gets the response before the complexity check runs"""
+    problem = catalog.get_problem(algorithm, problem_id)
+    if not problem:
+        return {"error": f"Problem {problem_id} not found for {algorithm}"}
+
+    load_start = time.perf_counter()
+    try:
+        solve_fn = compile_solution(code, "solve")
+    except Exception as e:
+        return {"results": [{"error": f"Could not load your code: {e}"}]}
+    load_ms = (time.perf_counter() - load_start) * 1000
+
+    if not solve_fn:
+        return {"results": [{"error": "No 'solve' function found in your code"}]}
+
+    results = grade(solve_fn, problem, hidden_tests=hidden_tests_for(algorithm, problem),
+                    source=code, on_result=on_result)
+    run_ms = sum(r.get("time_ms", 0) for r in results)
+
+    response = {
+        "results": results,
+        "timing": {"load_ms": round(load_ms, 3), "run_ms": round(run_ms, 3)}
+    }
+    if complexity and problem.get("complexity"):
+        if on_graded:
+            on_graded(response)
+        response["complexity"] = check_complexity(solve_fn, problem)
+    return response
+
+
+# --- Worker side ---
+def _limit_memory(memory_mb):
+    if resource is None or not memory_mb:
+        return
+    limit = memory_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+def _limit_cpu(cpu_seconds):
+    """RLIMIT_CPU is cumulative per process, so grant cpu_seconds on top of what is already used"""
+    if resource is None or not cpu_seconds:
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    soft = int(usage.ru_utime + usage.ru_stime) + cpu_seconds
+    hard = resource.getrlimit(resource.RLIMIT_CPU)[1]
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+KILLED_RESULT = {"results": [{"error": "Your code exceeded its CPU or memory limit and was stopped",
+                              "status": "killed"}]}
+
+def _run_job(job, report_fd, cpu_seconds):
+    """Forked child: grade one job, reporting over report_fd, then exit without returning"""
+    try:
+        reports = os.fdopen(report_fd, "w")
+
+        def send(event, payload):
+            reports.write(json.dumps({"event": event, "data": payload}, default=repr) + "\n")
+            reports.flush()
+
+        def graded(response):
+            # Grading is done: report it, then give the complexity check a fresh CPU allowance
+            send("graded", response)
+            _limit_cpu(COMPLEXITY_CPU_SECONDS)
+
+        _limit_cpu(cpu_seconds)
+        try:
+            result = grade_submission(job["code"], job["algorithm"], job["problem_id"],
+                                      on_result=lambda res: send("test", res),
+                                      complexity=job.get("complexity", False), on_graded=graded)
+        except BaseException as e:
+            # SystemExit, KeyboardInterrupt and the like from the submission end its grading, not the worker
+            result = {"results": [{"error": f"Your code stopped the grader: {type(e).__name__}: {e}"}]}
+        send("done", result)
+    finally:
+        os._exit(0)
+
+def _relay(read_fd, pid, send):
+    """Forward one child's messages to the pool until its "done"; make one up if the child died first"""
+    done = False
+    graded = None
+    with os.fdopen(read_fd, "r") as reports:
+        for line in reports:
+            try:
+                message = json.loads(line)
+                event, payload = message["event"], message["data"]
+            except (ValueError, TypeError, KeyError):
+                continue
+            if event == "done":
+                send("done", payload)
+                done = True
+                break
+            if event == "test":
+                send("test", payload)
+            elif event == "graded":
+                graded = payload
+                send("graded", payload)
+    # Threads the submission left running must not outlive its job
+    try:
+        os.kill(pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+    _, status = os.waitpid(pid, 0)
+    if done:
+        return
+    if graded is not None:
+        # Died during the complexity check: the test results still stand
+        send("done", dict(graded, complexity=COMPLEXITY_OUT_OF_TIME))
+    elif not os.WIFEXITED(status):
+        send("done", KILLED_RESULT)
+    else:
+        send("done", {"results": [{"error": f"Your code ended the grader process (exit code "
+                                            f"{os.WEXITSTATUS(status)}) before grading finished"}]})
+
+def worker_main(cpu_seconds, memory_mb):
+    # Keep the protocol on private descriptors so submissions can't print into it or read from it
+    channel_in = os.fdopen(os.dup(0), "r")
+    channel_out = os.fdopen(os.dup(1), "w")
+    devnull = os.open(os.devnull, os.O_RDWR)
+    os.dup2(devnull, 0)
+    os.dup2(devnull, 1)
+
+    # Pre-warm: parse the catalog and load hidden suites before the first job arrives
+    for algorithm, problems in catalog.problems.items():
+        for problem in problems:
+            hidden_tests_for(algorithm, problem)
+    _limit_memory(memory_mb)
+
+    def send(event, payload):
+        channel_out.write(json.dumps({"event": event, "data": payload}, default=repr) + "\n")
+        channel_out.flush()
+
+    send("ready", None)
+
+    for line in channel_in:
+        job = json.loads(line)
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            # The child only gets its own report pipe: the pool's channel is closed before user code runs
+            os.close(read_fd)
+            os.close(channel_in.fileno())
+            os.close(channel_out.fileno())
+            _run_job(job, write_fd, cpu_seconds)
+        os.close(write_fd)
+        _relay(read_fd, pid, send)
+
+# --- Parent side ---
+class _Worker:
+    """One grader process plus the bytes read from it that don't yet form a full line"""
+
+    def __init__(self, args, cwd):
+        self.process = subprocess.Popen(
+            args,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            cwd=cwd,
+            bufsize=0,
+            start_new_session=True,  # the worker and its per-job children share one process group
+        )
+        self.buffer = b""
+        self.ready = False
+
+    def wait_ready(self, timeout=120):
+        """Block until the worker finishes pre-warming; not counted against any job's time limit"""
+        message = self.read_message(time.monotonic() + timeout)
+        self.ready = bool(message) and message["event"] == "ready"
+        return self.ready
+
+    def send(self, line):
+        self.process.stdin.write(line.encode())
+
+    def read_message(self, deadline):
+        """Next JSON line from the worker; None on timeout, "" if the process died"""
+        fd = self.process.stdout.fileno()
+        while b"\n" not in self.buffer:
+            remaining = deadline - time.monotonic()
+            ready, _, _ = select.select([fd], [], [], max(remaining, 0))
+            if not ready:
+                return None
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                return ""
+            self.buffer += chunk
+        line, self.buffer = self.buffer.split(b"\n", 1)
+        return json.loads(line)
+
+    def stop(self):
+        # Take down the job child too; the group outlives the worker until the worker is reaped
+        if hasattr(os, "killpg"):
+            try:
+                os.killpg(self.process.pid, signal.SIGKILL)
+            except (ProcessLookupError, PermissionError):
+                pass
+        if self.process.poll() is None:
+            self.process.kill()
+        self.process.wait()
+
+
+class GraderPool:
+    """Fixed set of pre-started grader processes; a worker is replaced whenever it dies or times out"""
+
+    def __init__(self, workers=None, cpu_seconds=5, wall_seconds=10, memory_mb=512):
+        self.size = workers or os.cpu_count() or 1
+        self.cpu_seconds = cpu_seconds
+        self.wall_seconds = wall_seconds
+        self.memory_mb = memory_mb
+        self._idle = queue.Queue()
+        for _ in range(self.size):
+            self._idle.put(self._spawn())
+
+    def _spawn(self):
+        return _Worker(
+            [sys.executable, WORKER_SCRIPT, "--worker",
+             "--cpu-seconds", str(self.cpu_seconds), "--memory-mb", str(self.memory_mb)],
+            cwd=os.path.dirname(WORKER_SCRIPT),
+        )
+
+    def _replace(self, worker):
+        worker.stop()
+        return self._spawn()
+
+    def run(self, code, algorithm, problem_id, on_result=None, complexity=False):
+        """Grade one submission on the next free worker, blocking until it finishes.
+
+        on_result is called with each test result as the worker reports it; complexity
+        adds a scaled-input benchmark against the problem's declared target.
+        """
+        job = json.dumps({"code": code, "algorithm": algorithm, "problem_id": problem_id,
+                          "complexity": complexity}) + "\n"
+        worker = self._idle.get()
+        try:
+            if not worker.ready and not worker.wait_ready():
+                worker = self._replace(worker)
+                return {"error": "Grader worker failed to start"}
+            try:
+                worker.send(job)
+            except (BrokenPipeError, OSError):
+                # Worker died while idle; retry once on a fresh one
+                worker = self._replace(worker)
+                try:
+                    if not worker.wait_ready():
+                        raise BrokenPipeError
+                    worker.send(job)
+                except (BrokenPipeError, OSError):
+                    worker = self._replace(worker)
+                    return {"error": "Grader worker failed to start"}
+
+            deadline = time.monotonic() + self.wall_seconds
+            if complexity:
+                deadline += COMPLEXITY_CPU_SECONDS
+            graded = None
+            while True:
+                message = worker.read_message(deadline)
+                if message is None:
+                    worker = self._replace(worker)
+                    if graded is not None:
+                        return dict(graded, complexity=COMPLEXITY_OUT_OF_TIME)
+                    return {"results": [{"error": f"Time limit exceeded ({self.wall_seconds}s)", "status": "timeout"}]}
+                if not message:
+                    worker = self._replace(worker)
+                    return KILLED_RESULT
+
+                if message["event"] == "done":
+                    return message["data"]
+                if message["event"] == "graded":
+                    graded = message["data"]
+                elif on_result:
+                    on_result(message["data"])
+        finally:
+            self._idle.put(worker)
+
+    def close(self):
+        for _ in range(self.size):
+            worker = self._idle.get()
+            worker.process.stdin.close()
+            worker.stop()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """Shared pool, started on first use and sized from the GRADER_* environment variables"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = GraderPool(
+                    workers=int(os.environ.get("GRADER_WORKERS", 0)) or None,
+                    cpu_seconds=int(os.environ.get("GRADER_CPU_SECONDS", 5)),
+                    wall_seconds=float(os.environ.get("GRADER_WALL_SECONDS", 10)),
+                    memory_mb=int(os.environ.get("GRADER_MEMORY_MB", 512)),
+                )
+    return _pool
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="AlgoFlow grader worker")
+    parser.add_argument("--worker", action="store_true", help="Serve grading jobs over stdin/stdout")
+    parser.add_argument("--cpu-seconds", type=int, default=5)
+    parser.add_argument("--memory-mb", type=int, default=512)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker_main(args.cpu_seconds, args.memory_mb)
+    else:
+        parser.print_help()
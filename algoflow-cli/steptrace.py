@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Step traces for the visualizer: algorithms record what they do, playback shows it afterwards
+"""
+import gzip
+import json
+import sys
+import time
+from array import array
+
+# --- Event types: each step is one (op, a, b) triple ---
+COMPARE = 0    # a, b: indices compared; b == -1 compares arr[a] with the selected value
+SWAP = 1       # a, b: indices swapped
+SET = 2        # a: index written, b: value written
+SELECT = 3     # a: index whose value is picked (minimum, key or pivot), b: that value
+MERGE = 4      # a, b: range [a, b) whose two sorted runs are merged next
+PARTITION = 5  # a, b: range [a, b) partitioned next
+
+OP_NAMES = ("compare", "swap", "set", "select", "merge", "partition")
+
+MIN_KEYFRAME_INTERVAL = 256
+BINARY_MAGIC = b"AFTRACE1\n"
+
+
+class Trace:
+    """Array-backed list of deltas plus the list they start from.
+
+    Only swaps and sets change the list, and each step stores just its (op, a, b)
+    triple in three typed arrays, so a trace costs a few bytes per step however long
+    the list is. Keyframes (full snapshots every keyframe_interval steps) are built on
+    first seek; the default interval of max(256, n) keeps them no bigger than the
+    trace itself. Values must be integers.
+    """
+
+    def __init__(self, algorithm, initial, keyframe_interval=None):
+        self.algorithm = algorithm
+        self.initial = array("q", initial)
+        self.keyframe_interval = keyframe_interval or max(MIN_KEYFRAME_INTERVAL, len(self.initial))
+        self.ops = array("B")
+        self.a = array("q")
+        self.b = array("q")
+        self._keyframes = None
+        self._keyframes_steps = 0
+
+    def record(self, op, a, b=0):
+        self.ops.append(op)
+        self.a.append(a)
+        self.b.append(b)
+
+    def __len__(self):
+        return len(self.ops)
+
+    def __iter__(self):
+        return zip(self.ops, self.a, self.b)
+
+    # --- Seeking ---
+    def _apply(self, state, start, end):
+        ops, a, b = self.ops, self.a, self.b
+        for k in range(start, end):
+            op = ops[k]
+            if op == SWAP:
+                i, j = a[k], b[k]
+                state[i], state[j] = state[j], state[i]
+            elif op == SET:
+                state[a[k]] = b[k]
+
+    def _build_keyframes(self):
+        state = array("q", self.initial)
+        keyframes = [array("q", state)]
+        for start in range(0, len(self) - self.keyframe_interval + 1, self.keyframe_interval):
+            self._apply(state, start, start + self.keyframe_interval)
+            keyframes.append(array("q", state))
+        self._keyframes = keyframes
+        self._keyframes_steps = len(self)
+
+    def state_at(self, step):
+        """The list as it is before `step` runs; costs at most one keyframe interval of replay"""
+        step = max(0, min(step, len(self)))
+        if self._keyframes is None or self._keyframes_steps != len(self):
+            self._build_keyframes()
+        base = step // self.keyframe_interval
+        state = array("q", self._keyframes[base])
+        self._apply(state, base * self.keyframe_interval, step)
+        return state
+
+    # --- Serialization ---
+    def to_dict(self):
+        return {
+            "algorithm": self.algorithm,
+            "initial": self.initial.tolist(),
+            "keyframe_interval": self.keyframe_interval,
+            "ops": [OP_NAMES[op] for op in self.ops],
+            "a": self.a.tolist(),
+            "b": self.b.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        trace = cls(data["algorithm"], data["initial"], data.get("keyframe_interval"))
+        trace.ops = array("B", (OP_NAMES.index(name) for name in data["ops"]))
+        trace.a = array("q", data["a"])
+        trace.b = array("q", data["b"])
+        return trace
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), separators=(",", ":"))
+
+    def to_bytes(self):
+        """gzip'd binary form: a JSON header line, then the raw initial, ops, a and b arrays.
+
+        Each array is stored with the narrowest integer type that holds its values.
+        """
+        arrays = [_narrow(arr) for arr in (self.initial, self.ops, self.a, self.b)]
+        header = {
+            "algorithm": self.algorithm,
+            "n": len(self.initial),
+            "steps": len(self),
+            "keyframe_interval": self.keyframe_interval,
+            "byteorder": sys.byteorder,
+            "typecodes": [arr.typecode for arr in arrays],
+        }
+        body = b"".join(arr.tobytes() for arr in arrays)
+        return gzip.compress(BINARY_MAGIC + json.dumps(header).encode() + b"\n" + body)
+
+    @classmethod
+    def from_bytes(cls, data):
+        data = gzip.decompress(data)
+        if not data.startswith(BINARY_MAGIC):
+            raise ValueError("Not an AlgoFlow trace file")
+        header_line, body = data[len(BINARY_MAGIC):].split(b"\n", 1)
+        header = json.loads(header_line)
+        trace = cls(header["algorithm"], [], header["keyframe_interval"])
+
+        offset = 0
+        counts = (header["n"], header["steps"], header["steps"], header["steps"])
+        for name, count, typecode in zip(("initial", "ops", "a", "b"), counts, header["typecodes"]):
+            arr = array(typecode)
+            size = count * arr.itemsize
+            arr.frombytes(body[offset:offset + size])
+            if header["byteorder"] != sys.byteorder:
+                arr.byteswap()
+            offset += size
+            setattr(trace, name, array(getattr(trace, name).typecode, arr))
+        return trace
+
+    def save(self, path):
+        """Write the trace: binary for *.trace, gzip'd JSON for *.gz, plain JSON otherwise"""
+        if path.endswith(".trace"):
+            data = self.to_bytes()
+        elif path.endswith(".gz"):
+            data = gzip.compress(self.to_json().encode())
+        else:
+            data = self.to_json().encode()
+        with open(path, "wb") as f:
+            f.write(data)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            data = f.read()
+        if path.endswith(".trace"):
+            return cls.from_bytes(data)
+        if path.endswith(".gz"):
+            data = gzip.decompress(data)
+        return cls.from_dict(json.loads(data))
+
+
+def _narrow(arr):
+    """Copy of arr in the smallest signed integer type that fits all its values"""
+    if arr.typecode == "B":
+        return arr
+    low, high = (min(arr), max(arr)) if arr else (0, 0)
+    for typecode in ("b", "h", "i", "q"):
+        probe = array(typecode)
+        bits = probe.itemsize * 8
+        if -(1 << (bits - 1)) <= low and high < (1 << (bits - 1)):
+            return array(typecode, arr)
+    return arr
+
+
+def _ignore(op, a, b=0):
+    pass
+
+def recorder(trace):
+    """trace.record, or a no-op when the caller doesn't want a trace"""
+    return trace.record if trace is not None else _ignore
+
+
+# --- Playback ---
+def describe(op, a, b, arr, selected):
+    """Apply one step to arr and return the line to show for it; only the touched positions are printed"""
+    if op == COMPARE:
+        other = f"the selected {selected}" if b == -1 else f"{arr[b]} (index {b})"
+        return f"Comparing {arr[a]} (index {a}) and {other}"
+    if op == SWAP:
+        arr[a], arr[b] = arr[b], arr[a]
+        return f"Swapped {arr[b]} (index {a}) and {arr[a]} (index {b})"
+    if op == SET:
+        arr[a] = b
+        return f"  Placed {b} at index {a}"
+    if op == SELECT:
+        return f"Selected {b} at index {a}"
+    if op == MERGE:
+        return f"Merging the sorted runs in indices {a}..{b - 1}"
+    if op == PARTITION:
+        return f"Partitioning indices {a}..{b - 1}"
+    raise ValueError(f"Unknown trace op {op}")
+
+def play(trace, delay=1.0, start=0, end=None, out=print):
+    """Replay steps start..end of a trace, pausing `delay` seconds after each one (0 for no pause)"""
+    end = len(trace) if end is None else min(end, len(trace))
+    arr = trace.state_at(start).tolist()
+    # The selected value only matters to compare steps; find the latest one before `start`
+    selected = None
+    for k in range(start - 1, -1, -1):
+        if trace.ops[k] == SELECT:
+            selected = trace.b[k]
+            break
+
+    label = f"from step {start} " if start else ""
+    out(f"Running {trace.algorithm} {label}on list: {arr}\n")
+    for k in range(start, end):
+        op, a, b = trace.ops[k], trace.a[k], trace.b[k]
+        if op == SELECT:
+            selected = b
+        out(describe(op, a, b, arr, selected))
+        if delay:
+            time.sleep(delay)
+    out(f"Finished {trace.algorithm} after step {end} of {len(trace)}, list now: {arr}\n")
+    return arr
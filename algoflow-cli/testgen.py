@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Hidden test suites: generated inputs plus reference answers, cached on disk per problem and seed
+"""
+import bisect
+import functools
+import gzip
+import hashlib
+import json
+import os
+import random
+import string
+import threading
+
+from algoflow import merge_sort_bottom_up, quick_sort_iterative
+
+CACHE_DIR = os.environ.get("ALGOFLOW_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache"))
+
+DEFAULT_SIZES = (1, 2, 10, 100, 1000)
+DISTRIBUTIONS = ("random", "sorted", "reversed", "few_unique")
+
+
+# --- Input generators: (n, distribution, rng) -> input ---
+def _arrange(values, distribution):
+    if distribution == "sorted":
+        values.sort()
+    elif distribution == "reversed":
+        values.sort(reverse=True)
+    return values
+
+def gen_int_list(n, distribution, rng):
+    if distribution == "few_unique":
+        return rng.choices(range(-3, 4), k=n)
+    return _arrange(rng.choices(range(-10**6, 10**6 + 1), k=n), distribution)
+
+def gen_flag_list(n, distribution, rng):
+    return _arrange(rng.choices((0, 1, 2), k=n), distribution)
+
+def gen_string_list(n, distribution, rng):
+    alphabet = string.ascii_letters
+    if distribution == "few_unique":
+        words = ["".join(rng.choices(alphabet, k=rng.randint(1, 8))) for _ in range(3)]
+        return rng.choices(words, k=n)
+    return _arrange(["".join(rng.choices(alphabet, k=rng.randint(1, 8))) for _ in range(n)], distribution)
+
+def gen_two_sorted_lists(n, distribution, rng):
+    split = rng.randint(1, max(1, n - 1))
+    values = gen_int_list(n, distribution, rng)
+    return [sorted(values[:split]), sorted(values[split:])]
+
+def gen_sorted_with_target(n, distribution, rng):
+    values = sorted(gen_int_list(n, distribution, rng))
+    return {"arr": values, "target": rng.randint(-10**6, 10**6)}
+
+def gen_student_list(n, distribution, rng):
+    scores = rng.choices(range(60, 63), k=n) if distribution == "few_unique" else gen_int_list(n, distribution, rng)
+    return [{"name": f"student{i}", "score": score} for i, score in enumerate(scores)]
+
+INPUT_GENERATORS = {
+    "int_list": gen_int_list,
+    "flag_list": gen_flag_list,
+    "string_list": gen_string_list,
+    "two_sorted_lists": gen_two_sorted_lists,
+    "sorted_with_target": gen_sorted_with_target,
+    "student_list": gen_student_list,
+}
+
+
+# --- Reference answers, all O(n log n) or better ---
+def _merge_count(arr, pair_count):
+    """Bottom-up merge sort; pair_count(left, right) is added for every merge before it happens"""
+    runs = [[x] for x in arr]
+    total = 0
+    while len(runs) > 1:
+        merged = []
+        for k in range(0, len(runs) - 1, 2):
+            left, right = runs[k], runs[k + 1]
+            total += pair_count(left, right)
+            # Timsort spots the two sorted runs and merges them in linear time, in C
+            merged.append(sorted(left + right))
+        if len(runs) % 2:
+            merged.append(runs[-1])
+        runs = merged
+    return total
+
+def _inversions_across(left, right):
+    # For each right element, how many left elements are strictly larger
+    return len(left) * len(right) - sum(map(functools.partial(bisect.bisect_right, left), right))
+
+def _reverse_pairs_across(left, right):
+    return len(left) * len(right) - sum(map(functools.partial(bisect.bisect_right, left), [2 * x for x in right]))
+
+def count_inversions(arr):
+    return _merge_count(arr, _inversions_across)
+
+def count_reverse_pairs(arr):
+    return _merge_count(arr, _reverse_pairs_across)
+
+def bubble_passes(arr):
+    """Passes bubble sort makes, counting the final swap-free pass.
+
+    Each pass moves an element at most one step left, so the answer is one more than
+    the largest number of bigger elements sitting before any element.
+    """
+    ranks = {v: r for r, v in enumerate(sorted(set(arr)), start=1)}
+    tree = [0] * (len(ranks) + 1)
+    most_before = 0
+    for seen, value in enumerate(arr):
+        r = ranks[value]
+        not_bigger, i = 0, r
+        while i > 0:
+            not_bigger += tree[i]
+            i -= i & -i
+        most_before = max(most_before, seen - not_bigger)
+        i = r
+        while i < len(tree):
+            tree[i] += 1
+            i += i & -i
+    return most_before + 1
+
+def min_index(arr):
+    best = 0
+    for i in range(1, len(arr)):
+        if arr[i] < arr[best]:
+            best = i
+    return best
+
+def insert_target(data):
+    result = list(data["arr"])
+    bisect.insort(result, data["target"])
+    return result
+
+REFERENCES = {
+    "sort": sorted,
+    # The course's own algorithms, copied first because they sort in place
+    "merge_sort": lambda arr: merge_sort_bottom_up(list(arr)),
+    "quick_sort": lambda arr: quick_sort_iterative(list(arr)),
+    "merge_sorted": lambda pair: sorted(pair[0] + pair[1]),
+    "count_inversions": count_inversions,
+    "count_reverse_pairs": count_reverse_pairs,
+    "bubble_passes": bubble_passes,
+    "max": max,
+    "min_index": min_index,
+    "even_then_odd": lambda arr: sorted(arr, key=lambda x: (x % 2, x)),
+    "by_score_desc": lambda students: sorted(students, key=lambda s: -s["score"]),
+    "insert_target": insert_target,
+    # Splitting n elements down to single ones always makes 2n - 1 non-empty subarrays
+    "subarray_count": lambda arr: 2 * len(arr) - 1,
+}
+
+
+# --- Suite building and caching ---
+def build_suite(spec, seed):
+    """Generate every (size, distribution) case for a problem's "hidden_tests" spec"""
+    rng = random.Random(seed)
+    generate = INPUT_GENERATORS[spec["input"]]
+    reference = REFERENCES[spec["reference"]]
+    tests = []
+    for n in spec.get("sizes", DEFAULT_SIZES):
+        for distribution in spec.get("distributions", DISTRIBUTIONS):
+            test_input = generate(n, distribution, rng)
+            tests.append({
+                "input": test_input,
+                "output": reference(test_input),
+                "hidden": True,
+                "size": n,
+                "distribution": distribution,
+            })
+    return tests
+
+_memory_cache = {}
+_memory_lock = threading.Lock()
+
+def hidden_tests_for(algorithm, problem, seed=0):
+    """Hidden tests for a catalog problem, or [] if it declares none.
+
+    Suites are keyed by problem, seed and a hash of the spec, kept in memory for the
+    life of the process and written to CACHE_DIR as gzip'd JSON so that later
+    processes skip generation.
+    """
+    spec = problem.get("hidden_tests")
+    if not spec:
+        return []
+
+    spec_hash = hashlib.sha1(json.dumps(spec, sort_keys=True).encode()).hexdigest()[:12]
+    key = f"{algorithm}-{problem['id']}-{seed}-{spec_hash}"
+    with _memory_lock:
+        if key in _memory_cache:
+            return _memory_cache[key]
+
+    path = os.path.join(CACHE_DIR, f"{key}.json.gz")
+    try:
+        with open(path, "rb") as f:
+            tests = json.loads(gzip.decompress(f.read()))
+    except (OSError, ValueError):
+        tests = build_suite(spec, seed)
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            temp_path = f"{path}.{os.getpid()}.tmp"
+            # One compress call on the whole document; streaming json.dump into gzip is far slower
+            with open(temp_path, "wb") as f:
+                f.write(gzip.compress(json.dumps(tests).encode(), compresslevel=6))
+            os.replace(temp_path, path)
+        except OSError:
+            pass  # a read-only checkout still grades, it just regenerates next time
+
+    with _memory_lock:
+        _memory_cache[key] = tests
+    return tests
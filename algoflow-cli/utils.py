@@ -1,17 +1,24 @@
 #!/usr/bin/env python3
+import hashlib
 import json
 import os
 import importlib.util
+import threading
+import types
 
 PROBLEMS_FILE = os.path.join(os.path.dirname(__file__), "problems.json")
 
-def load_problems():
-    if not os.path.exists(PROBLEMS_FILE):
-        raise FileNotFoundError(f"{PROBLEMS_FILE} not found.")
+def read_problems_file(path=PROBLEMS_FILE):
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"{path} not found.")
     
-    with open(PROBLEMS_FILE, "r") as f:
+    with open(path, "r") as f:
         return json.load(f)
 
+def load_problems():
+    """Return the parsed problem set, served from the process-wide catalog"""
+    return catalog.problems
+
 def list_algorithms(problems):
     return list(problems.keys())
 
@@ -37,8 +44,74 @@ def format_problem(problem):
         desc += f"Input: {example['input']}\nOutput: {example['output']}\n\n"
     return desc
 
+# --- Problem catalog: parsed once, indexed by (algorithm, id) ---
+class ProblemCatalog:
+    """Process-wide view of problems.json that only re-parses when the file changes"""
+
+    def __init__(self, path=PROBLEMS_FILE):
+        self.path = path
+        self.version = None
+        self._problems = {}
+        self._index = {}
+        self._hashes = {}
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        mtime = os.stat(self.path).st_mtime_ns
+        if mtime == self.version:
+            return
+        with self._lock:
+            if mtime == self.version:
+                return
+            problems = read_problems_file(self.path)
+            index, hashes = {}, {}
+            for algorithm, entries in problems.items():
+                for problem in entries:
+                    key = (algorithm, str(problem["id"]))
+                    index[key] = problem
+                    hashes[key] = hashlib.sha1(json.dumps(problem, sort_keys=True).encode()).hexdigest()
+            self._problems, self._index, self._hashes, self.version = problems, index, hashes, mtime
+
+    @property
+    def problems(self):
+        self._refresh()
+        return self._problems
+
+    def snapshot(self):
+        """(version, problems) from the same parse of problems.json"""
+        self._refresh()
+        with self._lock:
+            return self.version, self._problems
+
+    def list_algorithms(self):
+        return list_algorithms(self.problems)
+
+    def list_problems_for_algorithm(self, algorithm):
+        return list_problems_for_algorithm(self.problems, algorithm)
+
+    def get_problem(self, algorithm, problem_id):
+        self._refresh()
+        return self._index.get((algorithm, str(problem_id)))
+
+    def problem_hash(self, algorithm, problem_id):
+        """Hash of one problem's definition; changes only when that problem is edited"""
+        self._refresh()
+        return self._hashes.get((algorithm, str(problem_id)))
+
+    def format_problem(self, problem):
+        return format_problem(problem)
+
+catalog = ProblemCatalog()
+
 def load_user_solution(solution_file, func_name):
     spec = importlib.util.spec_from_file_location("solution", solution_file)
     module = importlib.util.module_from_spec(spec)
     spec.loader.exec_module(module)
     return getattr(module, func_name, None)
+
+def compile_solution(code, func_name="solve", filename="user_solution.py"):
+    """Compile and execute submitted source once, returning the requested function"""
+    module = types.ModuleType("user_solution")
+    module.__file__ = filename
+    exec(compile(code, filename, "exec"), module.__dict__)
+    return getattr(module, func_name, None)
@@ -1,13 +1,32 @@
-from flask import Flask, request, jsonify, session
+from flask import Flask, request, jsonify, session, Response, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
 from flask_bcrypt import Bcrypt
 from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt_identity
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy import insert, tuple_, update
+from sqlalchemy.schema import CreateIndex
+from sqlalchemy.exc import IntegrityError
 from datetime import datetime, timedelta
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import atexit
+import base64
+import binascii
+import bisect
+import csv
+import gzip
+import hashlib
+import hmac
+import io
+import json
 import os
+import sqlite3
 import sys
-import tempfile
 import subprocess
+import threading
+import time
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -16,13 +35,25 @@ cli_path = Path(__file__).parent.parent / "algoflow-cli"
 sys.path.insert(0, str(cli_path))
 
 try:
-    from utils import load_problems, get_problem
+    from utils import catalog
     from grader import grade
+    from sandbox import get_pool
+    from jobs import get_job_queue, QueueFull
+    from resultcache import get_result_cache
 except ImportError:
     print("Warning: CLI tools not available")
-    load_problems = None
-    get_problem = None
+    catalog = None
     grade = None
+    get_pool = None
+    get_job_queue = None
+    get_result_cache = None
+
+from sqlite_storage import WriteQueue, configure_sqlite, sqlite_engine_options
+
+try:
+    import brotli
+except ImportError:
+    brotli = None  # gzip only
 
 # Load environment variables
 load_dotenv()
@@ -35,11 +66,28 @@ app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:/
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['JWT_SECRET_KEY'] = os.environ.get('JWT_SECRET_KEY', 'jwt-secret-change-this')
 app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(days=7)
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = sqlite_engine_options(
+    app.config['SQLALCHEMY_DATABASE_URI'], read_pool_size=int(os.environ.get('SQLITE_READ_POOL_SIZE', 8))
+)
+app.config['SQLITE_WRITE_QUEUE'] = os.environ.get('SQLITE_WRITE_QUEUE', '1') == '1'  # SQLite only
+app.config['PROFILE_CACHE_SIZE'] = int(os.environ.get('PROFILE_CACHE_SIZE', 10000))
+app.config['PROFILE_CACHE_TTL'] = float(os.environ.get('PROFILE_CACHE_TTL', 300))
+app.config['PROFILE_CACHE_PATH'] = os.environ.get('PROFILE_CACHE_PATH')  # shared by all workers on this host
+# Seconds a worker trusts its own copy; raise it only when running a single worker process
+app.config['PROFILE_CACHE_LOCAL_TTL'] = float(os.environ.get('PROFILE_CACHE_LOCAL_TTL', 5))
+app.config['BCRYPT_LOG_ROUNDS'] = int(os.environ.get('BCRYPT_LOG_ROUNDS', 12))  # bcrypt work factor
+app.config['PASSWORD_HASH_WORKERS'] = int(os.environ.get('PASSWORD_HASH_WORKERS', os.cpu_count() or 1))
+app.config['PASSWORD_HASH_MAX_WAITING'] = int(os.environ.get('PASSWORD_HASH_MAX_WAITING', 64))
+app.config['LEADERBOARD_REFRESH_INTERVAL'] = float(os.environ.get('LEADERBOARD_REFRESH_INTERVAL', 5))
+app.config['ADMIN_TOKEN'] = os.environ.get('ADMIN_TOKEN')  # unset disables the admin endpoints
+app.config['LAST_LOGIN_FLUSH_INTERVAL'] = float(os.environ.get('LAST_LOGIN_FLUSH_INTERVAL', 5))  # 0 writes on login
 
 # Initialize extensions
 db = SQLAlchemy(app)
 bcrypt = Bcrypt(app)
 jwt = JWTManager(app)
+# On SQLite: WAL and friends on every connection, and all request writes go through one writer thread
+write_queue = WriteQueue(app, db, enabled=configure_sqlite(app, db) and app.config['SQLITE_WRITE_QUEUE'])
 CORS(app)  # Allow frontend to talk to backend
 
 # Database Models - where we store all the user data! 🗄️
@@ -48,8 +96,8 @@ class User(db.Model):
     email = db.Column(db.String(120), unique=True, nullable=False)
     name = db.Column(db.String(100), nullable=False)
     password_hash = db.Column(db.String(128), nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    last_login = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    last_login = db.Column(db.DateTime, index=True)
     
     # Relationships - users can have progress and activities
     progress = db.relationship('UserProgress', backref='user', lazy=True, uselist=False)
@@ -61,14 +109,46 @@ class User(db.Model):
 class UserProgress(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    completed_algorithms = db.Column(db.Text, default='[]')  # JSON string of algorithm IDs
-    solved_problems = db.Column(db.Text, default='[]')  # JSON string of problem IDs
+    # Legacy JSON lists - moved into CompletedAlgorithm / SolvedProblem the first time a user is seen
+    completed_algorithms = db.Column(db.Text, default='[]')
+    solved_problems = db.Column(db.Text, default='[]')
     total_study_time = db.Column(db.Integer, default=0)  # in minutes
     current_streak = db.Column(db.Integer, default=0)
     longest_streak = db.Column(db.Integer, default=0)
     last_activity_date = db.Column(db.DateTime)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+# One row per (user, algorithm) and (user, problem) - the primary key doubles as the per-user index
+class CompletedAlgorithm(db.Model):
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    algorithm_id = db.Column(db.String(100), primary_key=True, index=True)
+    solved_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+class SolvedProblem(db.Model):
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    problem_id = db.Column(db.String(100), primary_key=True, index=True)
+    solved_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+class ProgressEvent(db.Model):
+    """Client event IDs already applied by /api/progress/batch, so a retried batch doesn't double-count"""
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    event_id = db.Column(db.String(64), primary_key=True)
+    applied_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+class LeaderboardEntry(db.Model):
+    """Per-user leaderboard counters, kept current by every progress write"""
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    solved_count = db.Column(db.Integer, default=0, nullable=False)
+    longest_streak = db.Column(db.Integer, default=0, nullable=False)
+    total_study_time = db.Column(db.Integer, default=0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+    
+    __table_args__ = (
+        db.Index('ix_leaderboard_solved', 'solved_count', 'user_id'),
+        db.Index('ix_leaderboard_streak', 'longest_streak', 'user_id'),
+        db.Index('ix_leaderboard_study_time', 'total_study_time', 'user_id'),
+    )
+
 class UserActivity(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -77,6 +157,460 @@ class UserActivity(db.Model):
     score = db.Column(db.Integer, default=0)
     time_spent = db.Column(db.Integer, default=0)  # in minutes
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # A user's feed is read newest first, a page at a time, straight off this index
+    __table_args__ = (db.Index('ix_user_activity_user_created', 'user_id', 'created_at', 'id'),)
+
+# Activity feed paging - opaque (created_at, id) cursors 📜
+ACTIVITY_PAGE_SIZE = 10
+ACTIVITY_PAGE_MAX = 100
+
+def encode_cursor(created_at, activity_id):
+    raw = json.dumps([created_at.isoformat(), activity_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    """(created_at, id) of the last activity on the previous page; ValueError if the cursor is malformed"""
+    try:
+        created_at, activity_id = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        return datetime.fromisoformat(created_at), int(activity_id)
+    except (binascii.Error, TypeError, UnicodeDecodeError) as e:
+        raise ValueError(str(e))
+
+# Progress helpers - idempotent writes and indexed reads 🧮
+def insert_ignore(model, **values):
+    """Insert a row unless one with the same primary key exists - one statement, safe under concurrent requests"""
+    insert_ignore_many(model, [values])
+
+def insert_ignore_many(model, rows):
+    """insert_ignore for many rows in a single multi-row INSERT"""
+    if not rows:
+        return
+    dialect = db.engine.dialect.name
+    if dialect == 'sqlite':
+        db.session.execute(sqlite_insert(model).values(rows).on_conflict_do_nothing())
+    elif dialect == 'postgresql':
+        db.session.execute(postgresql_insert(model).values(rows).on_conflict_do_nothing())
+    else:
+        for values in rows:
+            db.session.merge(model(**values))
+
+def upsert(model, values, key):
+    """Insert a row, or update the other columns of the row that matches on the `key` columns"""
+    updates = {column: value for column, value in values.items() if column not in key}
+    dialect = db.engine.dialect.name
+    if dialect == 'sqlite':
+        db.session.execute(sqlite_insert(model).values(**values).on_conflict_do_update(index_elements=key, set_=updates))
+    elif dialect == 'postgresql':
+        db.session.execute(postgresql_insert(model).values(**values).on_conflict_do_update(index_elements=key, set_=updates))
+    else:
+        db.session.merge(model(**values))
+
+def advance_streak(progress, now):
+    """Count activity at `now` towards the daily streak"""
+    today = now.date()
+    if progress.last_activity_date:
+        last_date = progress.last_activity_date.date()
+        if today == last_date:
+            # Same day, no change
+            pass
+        elif (today - last_date).days == 1:
+            # Consecutive day
+            progress.current_streak += 1
+        else:
+            # Streak broken
+            progress.current_streak = 1
+    else:
+        progress.current_streak = 1
+    
+    progress.longest_streak = max(progress.longest_streak, progress.current_streak)
+    progress.last_activity_date = now
+
+def migrate_legacy_progress(progress):
+    """Move a user's old JSON-list progress into the association tables (once per user)"""
+    for column, model, key in (('completed_algorithms', CompletedAlgorithm, 'algorithm_id'),
+                               ('solved_problems', SolvedProblem, 'problem_id')):
+        legacy = getattr(progress, column)
+        if legacy and legacy != '[]':
+            for item_id in json.loads(legacy):
+                insert_ignore(model, user_id=progress.user_id, solved_at=datetime.utcnow(), **{key: str(item_id)})
+            setattr(progress, column, '[]')
+
+def progress_lists(user_id):
+    """(completed algorithm IDs, solved problem IDs) in the order they were completed"""
+    completed = db.session.query(CompletedAlgorithm.algorithm_id)\
+        .filter_by(user_id=user_id).order_by(CompletedAlgorithm.solved_at).all()
+    solved = db.session.query(SolvedProblem.problem_id)\
+        .filter_by(user_id=user_id).order_by(SolvedProblem.solved_at).all()
+    return [row[0] for row in completed], [row[0] for row in solved]
+
+def profile_payload(user, progress, completed_algorithms, solved_problems):
+    """The /api/user/profile response body"""
+    last_login = last_login_flusher.pending_for(user.id) or user.last_login
+    return {
+        'user': {
+            'id': user.id,
+            'email': user.email,
+            'name': user.name,
+            'created_at': user.created_at.isoformat(),
+            'last_login': last_login.isoformat() if last_login else None
+        },
+        'progress': {
+            'completed_algorithms': completed_algorithms,
+            'solved_problems': solved_problems,
+            'total_study_time': progress.total_study_time,
+            'current_streak': progress.current_streak,
+            'longest_streak': progress.longest_streak,
+            'last_activity_date': progress.last_activity_date.isoformat() if progress.last_activity_date else None
+        }
+    }
+
+# Profile cache - most profile reads never touch the database ⚡
+class SharedProfileStore:
+    """Profiles in a local SQLite file, so every worker process on the host shares one copy"""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._connect().execute(
+            'CREATE TABLE IF NOT EXISTS profile_cache '
+            '(user_id INTEGER PRIMARY KEY, payload TEXT NOT NULL, expires_at REAL NOT NULL)'
+        )
+
+    def _connect(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=1, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            self._local.connection = connection
+        return connection
+
+    def get(self, user_id):
+        row = self._connect().execute(
+            'SELECT payload FROM profile_cache WHERE user_id = ? AND expires_at > ?', (user_id, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, user_id, payload, ttl):
+        self._connect().execute(
+            'INSERT OR REPLACE INTO profile_cache (user_id, payload, expires_at) VALUES (?, ?, ?)',
+            (user_id, json.dumps(payload), time.time() + ttl)
+        )
+
+    def delete(self, user_id):
+        self._connect().execute('DELETE FROM profile_cache WHERE user_id = ?', (user_id,))
+
+class ProfileCache:
+    """Per-user profile payloads in an in-process LRU with TTL, optionally backed by a SharedProfileStore.
+
+    Writers update it (write-through) instead of invalidating, so the next read is still a hit.
+    Write-through only reaches the writing process, so in-process entries live at most
+    local_ttl seconds, the longest another worker can serve a stale profile. With several
+    workers, set a shared store: its entries keep the full ttl and every writer updates them,
+    so workers refill from it instead of the database.
+    """
+
+    def __init__(self, max_entries=10000, ttl=300, shared_path=None, local_ttl=5):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.shared = SharedProfileStore(shared_path) if shared_path else None
+        self.local_ttl = min(ttl, local_ttl)
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _put_local(self, user_id, payload):
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self.local_ttl, payload)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get(self, user_id):
+        user_id = int(user_id)  # JWT identities may arrive as strings
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry and entry[0] > time.monotonic():
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[1]
+            if entry:
+                del self._entries[user_id]
+        payload = self.shared.get(user_id) if self.shared else None
+        if payload is not None:
+            self._put_local(user_id, payload)
+            with self._lock:
+                self.shared_hits += 1
+            return payload
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, user_id, payload):
+        user_id = int(user_id)
+        self._put_local(user_id, payload)
+        if self.shared:
+            self.shared.put(user_id, payload, self.ttl)
+
+    def patch(self, user_id, section, **fields):
+        """Write-through for a partial change: update the cached payload if there is one"""
+        payload = self.get(user_id)
+        if payload is not None:
+            self.put(user_id, {**payload, section: {**payload[section], **fields}})
+
+    def discard(self, user_id):
+        user_id = int(user_id)
+        with self._lock:
+            self._entries.pop(user_id, None)
+        if self.shared:
+            self.shared.delete(user_id)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.shared_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'shared_hits': self.shared_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round((self.hits + self.shared_hits) / lookups, 4) if lookups else None
+            }
+
+profile_cache = ProfileCache(
+    max_entries=app.config['PROFILE_CACHE_SIZE'],
+    ttl=app.config['PROFILE_CACHE_TTL'],
+    shared_path=app.config['PROFILE_CACHE_PATH'],
+    local_ttl=app.config['PROFILE_CACHE_LOCAL_TTL']
+)
+
+# Leaderboard - ranked from a counters table, kept sorted in memory 🏆
+LEADERBOARD_METRICS = {
+    'solved': 'solved_count',
+    'streak': 'longest_streak',
+    'study_time': 'total_study_time'
+}
+LEADERBOARD_MAX = 100
+
+def leaderboard_values(user_id, progress):
+    """A user's current leaderboard counters; solved problems are counted off the (user_id, problem_id) key"""
+    solved_count = db.session.query(db.func.count(SolvedProblem.problem_id)).filter_by(user_id=user_id).scalar()
+    return {
+        'solved_count': solved_count,
+        'longest_streak': progress.longest_streak or 0,
+        'total_study_time': progress.total_study_time or 0
+    }
+
+def sync_leaderboard(user_id, progress):
+    """Write the user's counters in the current transaction; pass the result to leaderboard.apply after commit"""
+    values = leaderboard_values(user_id, progress)
+    upsert(LeaderboardEntry, {'user_id': user_id, 'updated_at': datetime.utcnow(), **values}, ['user_id'])
+    return values
+
+class Leaderboard:
+    """Every user's counters, with one list per metric kept sorted by (-value, user_id).
+
+    Rank lookups and top-N are binary searches and slices; an update moves one key in each
+    list. This process applies its own writes right away and picks up other workers' writes
+    from the updated_at index at most every `refresh_interval` seconds.
+    """
+
+    def __init__(self, refresh_interval=5):
+        self.refresh_interval = refresh_interval
+        self._values = {}
+        self._ranked = {column: [] for column in LEADERBOARD_METRICS.values()}
+        self._lock = threading.Lock()
+        self._synced_through = None
+        self._next_refresh = 0
+
+    def _set(self, user_id, values):
+        old = self._values.get(user_id)
+        for column, ranked in self._ranked.items():
+            if old is not None:
+                del ranked[bisect.bisect_left(ranked, (-old[column], user_id))]
+            bisect.insort(ranked, (-values[column], user_id))
+        self._values[user_id] = {column: values[column] for column in self._ranked}
+
+    def __len__(self):
+        return len(self._values)
+
+    def apply(self, user_id, values):
+        with self._lock:
+            self._set(user_id, values)
+
+    def refresh(self, force=False):
+        """Load rows written since the last refresh (all of them the first time)"""
+        if not force and time.monotonic() < self._next_refresh:
+            return
+        query = LeaderboardEntry.query
+        if self._synced_through:
+            # A second of overlap covers rows committed late with an earlier timestamp
+            query = query.filter(LeaderboardEntry.updated_at >= self._synced_through - timedelta(seconds=1))
+        rows = query.all()
+        with self._lock:
+            for row in rows:
+                self._set(row.user_id, {column: getattr(row, column) for column in self._ranked})
+                if self._synced_through is None or row.updated_at > self._synced_through:
+                    self._synced_through = row.updated_at
+            self._next_refresh = time.monotonic() + self.refresh_interval
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+            for ranked in self._ranked.values():
+                ranked.clear()
+            self._synced_through = None
+            self._next_refresh = 0
+
+    def top(self, metric, limit=10):
+        """[(rank, user_id, value)] for the first `limit` users; ties share a rank"""
+        column = LEADERBOARD_METRICS[metric]
+        self.refresh()
+        with self._lock:
+            ranked = self._ranked[column][:limit]
+            entries = []
+            for position, (key, user_id) in enumerate(ranked):
+                rank = entries[-1][0] if entries and entries[-1][2] == -key else position + 1
+                entries.append((rank, user_id, -key))
+            return entries
+
+    def rank(self, user_id):
+        """{metric: {'rank', 'value'}} for one user, out of `total` users on the board"""
+        self.refresh()
+        with self._lock:
+            values = self._values.get(user_id) or {column: 0 for column in self._ranked}
+            ranks = {
+                metric: {
+                    'rank': bisect.bisect_left(self._ranked[column], (-values[column],)) + 1,
+                    'value': values[column]
+                } for metric, column in LEADERBOARD_METRICS.items()
+            }
+            return ranks, len(self._values)
+
+leaderboard = Leaderboard(refresh_interval=app.config['LEADERBOARD_REFRESH_INTERVAL'])
+
+# Last-login flusher - logins don't wait on a database write ⏱️
+class LastLoginFlusher:
+    """Collects last_login times in memory and writes them in one UPDATE every `interval` seconds.
+
+    Only the latest time per user is kept, so a burst of logins costs one row update each
+    at most. Pending times are written at exit; a crash loses at most one interval of them.
+    """
+
+    def __init__(self, interval=5):
+        self.interval = interval
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def touch(self, user_id, when):
+        if self.interval <= 0:
+            self._write({user_id: when})
+            return
+        with self._lock:
+            self._pending[user_id] = when
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='last-login-flusher', daemon=True)
+                self._thread.start()
+
+    def pending_for(self, user_id):
+        with self._lock:
+            return self._pending.get(user_id)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def _write(self, pending):
+        write_queue.run(self._update_rows, pending)
+
+    @staticmethod
+    def _update_rows(pending):
+        db.session.execute(update(User), [{'id': user_id, 'last_login': when} for user_id, when in pending.items()])
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        try:
+            self._write(pending)
+        except Exception as e:
+            app.logger.warning('Could not write last_login times: %s', e)
+            with self._lock:
+                # Put them back unless a newer login arrived meanwhile
+                for user_id, when in pending.items():
+                    self._pending.setdefault(user_id, when)
+
+last_login_flusher = LastLoginFlusher(interval=app.config['LAST_LOGIN_FLUSH_INTERVAL'])
+atexit.register(last_login_flusher.flush)
+
+# Password hashing - bcrypt runs on its own bounded pool 🔐
+class HashingBusy(Exception):
+    """Raised when more passwords are waiting to be hashed than the pool allows"""
+
+class PasswordHasher:
+    """bcrypt on a thread pool sized to the cores: bcrypt releases the GIL, so hashes run in parallel.
+
+    At most `workers` hashes run at once and `max_waiting` more queue behind them; past
+    that, requests fail fast with HashingBusy instead of piling up. Hashes stored with a
+    different work factor than BCRYPT_LOG_ROUNDS are rehashed after a successful login.
+    """
+
+    def __init__(self, rounds=12, workers=1, max_waiting=64):
+        self.rounds = rounds
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bcrypt')
+        self._slots = threading.BoundedSemaphore(workers + max_waiting)
+
+    def _submit(self, fn, *args, wait=True):
+        if not self._slots.acquire(timeout=5 if wait else 0):
+            raise HashingBusy()
+        future = self._pool.submit(fn, *args)
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def _hash(self, password):
+        return bcrypt.generate_password_hash(password, self.rounds).decode('utf-8')
+
+    def hash(self, password):
+        return self._submit(self._hash, password).result()
+
+    def check(self, password_hash, password):
+        return self._submit(bcrypt.check_password_hash, password_hash, password).result()
+
+    def needs_rehash(self, password_hash):
+        # bcrypt hashes look like $2b$<cost>$<salt and hash>
+        try:
+            return int(password_hash.split('$')[2]) != self.rounds
+        except (IndexError, ValueError):
+            return False
+
+    def _rehash(self, user_id, password):
+        write_queue.run(self._store_hash, user_id, self._hash(password))
+
+    @staticmethod
+    def _store_hash(user_id, password_hash):
+        db.session.execute(update(User).where(User.id == user_id).values(password_hash=password_hash))
+
+    def rehash_later(self, user_id, password):
+        """Store a hash at the current work factor in the background; skipped if the pool is full"""
+        try:
+            self._submit(self._rehash, user_id, password, wait=False)
+        except HashingBusy:
+            pass  # the next login tries again
+
+password_hasher = PasswordHasher(
+    rounds=app.config['BCRYPT_LOG_ROUNDS'],
+    workers=app.config['PASSWORD_HASH_WORKERS'],
+    max_waiting=app.config['PASSWORD_HASH_MAX_WAITING']
+)
 
 # API Routes - the endpoints that make everything work! 🚀
 
@@ -86,9 +620,96 @@ def health_check():
     return jsonify({
         'status': 'healthy',
         'message': 'AlgoFlow API is running! 🦉',
-        'timestamp': datetime.utcnow().isoformat()
+        'timestamp': datetime.utcnow().isoformat(),
+        'cli_available': catalog is not None and grade is not None
     })
 
+# Write jobs - run by write_queue, which commits them; they return plain data, not ORM objects ✍️
+def create_user(email, name, password_hash):
+    """A new user and their progress record; raises IntegrityError if the email is taken"""
+    user = User(email=email, name=name, password_hash=password_hash)
+    user.progress = UserProgress()
+    db.session.add(user)
+    db.session.flush()
+    return user.id
+
+def progress_snapshot(user, progress):
+    """Profile payload and progress response after a write, read inside the write's transaction"""
+    completed_algorithms, solved_problems = progress_lists(user.id)
+    return {
+        'profile': profile_payload(user, progress, completed_algorithms, solved_problems),
+        'progress': {
+            'completed_algorithms': completed_algorithms,
+            'solved_problems': solved_problems,
+            'total_study_time': progress.total_study_time,
+            'current_streak': progress.current_streak,
+            'longest_streak': progress.longest_streak
+        }
+    }
+
+def prepare_profile(user_id):
+    """Profile payload for a user whose progress row is missing or still holds legacy lists"""
+    user = db.session.get(User, user_id)
+    if not user:
+        return None
+    
+    progress = user.progress
+    if not progress:
+        progress = UserProgress(user_id=user.id)
+        db.session.add(progress)
+        db.session.flush()
+    else:
+        migrate_legacy_progress(progress)
+    return progress_snapshot(user, progress)['profile']
+
+def apply_progress_update(user_id, data):
+    """One /api/progress/update event; None if the user doesn't exist"""
+    user = db.session.get(User, user_id)
+    if not user:
+        return None
+    
+    progress = user.progress
+    if not progress:
+        progress = UserProgress(user_id=user.id)
+        db.session.add(progress)
+    else:
+        migrate_legacy_progress(progress)
+    
+    # Update based on activity type - completions are idempotent single-row inserts
+    activity_type = data['activity_type']
+    
+    if activity_type == 'algorithm':
+        algorithm_id = data.get('algorithm_id')
+        if algorithm_id:
+            insert_ignore(CompletedAlgorithm, user_id=user.id, algorithm_id=str(algorithm_id), solved_at=datetime.utcnow())
+    
+    elif activity_type == 'problem':
+        problem_id = data.get('problem_id')
+        if problem_id:
+            insert_ignore(SolvedProblem, user_id=user.id, problem_id=str(problem_id), solved_at=datetime.utcnow())
+    
+    elif activity_type == 'study_session':
+        time_spent = data.get('time_spent', 0)
+        progress.total_study_time += time_spent
+    
+    # Update streak
+    advance_streak(progress, datetime.utcnow())
+    
+    # Keep the leaderboard counters in step, in the same transaction
+    board_values = sync_leaderboard(user.id, progress)
+    
+    # Create activity record
+    activity = UserActivity(
+        user_id=user.id,
+        activity_type=activity_type,
+        activity_name=data.get('activity_name', ''),
+        score=data.get('score', 0),
+        time_spent=data.get('time_spent', 0)
+    )
+    db.session.add(activity)
+    
+    return {'leaderboard': board_values, **progress_snapshot(user, progress)}
+
 @app.route('/api/auth/register', methods=['POST'])
 def register():
     """Create a new user account - welcome to the family! 🎉"""
@@ -103,35 +724,29 @@ def register():
         password = data['password']
         name = data['name'].strip()
         
-        # Check if user already exists
-        if User.query.filter_by(email=email).first():
+        # Create the user and their initial progress record in one transaction;
+        # the unique email constraint catches duplicates, no lookup needed first
+        password_hash = password_hasher.hash(password)
+        try:
+            user_id = write_queue.run(create_user, email, name, password_hash)
+        except IntegrityError:
             return jsonify({'error': 'Email already registered'}), 400
         
-        # Create new user
-        password_hash = bcrypt.generate_password_hash(password).decode('utf-8')
-        new_user = User(email=email, name=name, password_hash=password_hash)
-        
-        db.session.add(new_user)
-        db.session.commit()
-        
-        # Create initial progress record
-        progress = UserProgress(user_id=new_user.id)
-        db.session.add(progress)
-        db.session.commit()
-        
         # Generate JWT token
-        access_token = create_access_token(identity=new_user.id)
+        access_token = create_access_token(identity=user_id)
         
         return jsonify({
             'message': 'User created successfully! 🎉',
             'user': {
-                'id': new_user.id,
-                'email': new_user.email,
-                'name': new_user.name
+                'id': user_id,
+                'email': email,
+                'name': name
             },
             'access_token': access_token
         }), 201
         
+    except HashingBusy:
+        return jsonify({'error': 'Server busy, please try again'}), 503
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': 'Registration failed', 'details': str(e)}), 500
@@ -148,15 +763,19 @@ def login():
         email = data['email'].lower().strip()
         password = data['password']
         
-        # Find user
-        user = User.query.filter_by(email=email).first()
+        # Find user - only the columns the login check and response need
+        user = db.session.query(User.id, User.email, User.name, User.password_hash) \
+            .filter_by(email=email).first()
         
-        if not user or not bcrypt.check_password_hash(user.password_hash, password):
+        if not user or not password_hasher.check(user.password_hash, password):
             return jsonify({'error': 'Invalid email or password'}), 401
+        if password_hasher.needs_rehash(user.password_hash):
+            password_hasher.rehash_later(user.id, password)
         
-        # Update last login
-        user.last_login = datetime.utcnow()
-        db.session.commit()
+        # Update last login - written in the background by last_login_flusher
+        last_login = datetime.utcnow()
+        last_login_flusher.touch(user.id, last_login)
+        profile_cache.patch(user.id, 'user', last_login=last_login.isoformat())
         
         # Generate JWT token
         access_token = create_access_token(identity=user.id)
@@ -171,6 +790,8 @@ def login():
             'access_token': access_token
         }), 200
         
+    except HashingBusy:
+        return jsonify({'error': 'Server busy, please try again'}), 503
     except Exception as e:
         return jsonify({'error': 'Login failed', 'details': str(e)}), 500
 
@@ -180,39 +801,27 @@ def get_profile():
     """Get current user's profile and progress 📊"""
     try:
         user_id = get_jwt_identity()
+        cached = profile_cache.get(user_id)
+        if cached is not None:
+            return jsonify(cached), 200
+        
         user = User.query.get(user_id)
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
         
-        # Get progress data
+        # Get progress data; creating or migrating it is a write, so it goes through the write queue
         progress = user.progress
-        if not progress:
-            progress = UserProgress(user_id=user.id)
-            db.session.add(progress)
-            db.session.commit()
+        if not progress or progress.completed_algorithms != '[]' or progress.solved_problems != '[]':
+            payload = write_queue.run(prepare_profile, user.id)
+            if payload is None:
+                return jsonify({'error': 'User not found'}), 404
+        else:
+            completed_algorithms, solved_problems = progress_lists(user.id)
+            payload = profile_payload(user, progress, completed_algorithms, solved_problems)
+        profile_cache.put(user_id, payload)
         
-        import json
-        completed_algorithms = json.loads(progress.completed_algorithms)
-        solved_problems = json.loads(progress.solved_problems)
-        
-        return jsonify({
-            'user': {
-                'id': user.id,
-                'email': user.email,
-                'name': user.name,
-                'created_at': user.created_at.isoformat(),
-                'last_login': user.last_login.isoformat() if user.last_login else None
-            },
-            'progress': {
-                'completed_algorithms': completed_algorithms,
-                'solved_problems': solved_problems,
-                'total_study_time': progress.total_study_time,
-                'current_streak': progress.current_streak,
-                'longest_streak': progress.longest_streak,
-                'last_activity_date': progress.last_activity_date.isoformat() if progress.last_activity_date else None
-            }
-        }), 200
+        return jsonify(payload), 200
         
     except Exception as e:
         return jsonify({'error': 'Failed to get profile', 'details': str(e)}), 500
@@ -228,97 +837,171 @@ def update_progress():
         if not data or not data.get('activity_type'):
             return jsonify({'error': 'Activity type required'}), 400
         
-        user = User.query.get(user_id)
-        if not user:
+        result = write_queue.run(apply_progress_update, int(user_id), data)
+        if result is None:
             return jsonify({'error': 'User not found'}), 404
         
-        progress = user.progress
-        if not progress:
-            progress = UserProgress(user_id=user.id)
-            db.session.add(progress)
-        
-        import json
-        
-        # Update based on activity type
-        activity_type = data['activity_type']
-        
-        if activity_type == 'algorithm':
-            algorithm_id = data.get('algorithm_id')
-            if algorithm_id:
-                completed = json.loads(progress.completed_algorithms)
-                if algorithm_id not in completed:
-                    completed.append(algorithm_id)
-                    progress.completed_algorithms = json.dumps(completed)
-        
-        elif activity_type == 'problem':
-            problem_id = data.get('problem_id')
-            if problem_id:
-                solved = json.loads(progress.solved_problems)
-                if problem_id not in solved:
-                    solved.append(problem_id)
-                    progress.solved_problems = json.dumps(solved)
-        
-        elif activity_type == 'study_session':
-            time_spent = data.get('time_spent', 0)
-            progress.total_study_time += time_spent
-        
-        # Update streak
-        today = datetime.utcnow().date()
-        if progress.last_activity_date:
-            last_date = progress.last_activity_date.date()
-            if today == last_date:
-                # Same day, no change
-                pass
-            elif (today - last_date).days == 1:
-                # Consecutive day
-                progress.current_streak += 1
-            else:
-                # Streak broken
-                progress.current_streak = 1
-        else:
-            progress.current_streak = 1
+        # Committed: update this process's leaderboard, and write through to the profile cache
+        leaderboard.apply(int(user_id), result['leaderboard'])
+        profile_cache.put(user_id, result['profile'])
+        return jsonify({
+            'message': 'Progress updated successfully! 🎉',
+            'progress': result['progress']
+        }), 200
         
-        progress.longest_streak = max(progress.longest_streak, progress.current_streak)
-        progress.last_activity_date = datetime.utcnow()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Failed to update progress', 'details': str(e)}), 500
+
+PROGRESS_BATCH_MAX = 500
+
+def apply_progress_events(user_id, events):
+    """Write job: apply events in order with one statement per table; None if the user doesn't exist"""
+    user = db.session.get(User, user_id)
+    if not user:
+        return None
+    
+    progress = user.progress
+    if not progress:
+        progress = UserProgress(user_id=user.id)
+        db.session.add(progress)
+    else:
+        migrate_legacy_progress(progress)
+    
+    # Skip events already applied by an earlier attempt, and repeats within this batch
+    event_ids = [str(event['id']) for event in events]
+    seen = {row[0] for row in db.session.query(ProgressEvent.event_id)
+            .filter(ProgressEvent.user_id == user.id, ProgressEvent.event_id.in_(event_ids))}
+    fresh = []
+    for event_id, event in zip(event_ids, events):
+        if event_id not in seen:
+            seen.add(event_id)
+            fresh.append((event_id, event))
+    if not fresh:
+        return {'applied': 0, 'duplicates': len(events), 'leaderboard': None, **progress_snapshot(user, progress)}
+    
+    now = datetime.utcnow()
+    insert_ignore_many(CompletedAlgorithm, [
+        {'user_id': user.id, 'algorithm_id': str(event['algorithm_id']), 'solved_at': now}
+        for _, event in fresh if event['activity_type'] == 'algorithm' and event.get('algorithm_id')
+    ])
+    insert_ignore_many(SolvedProblem, [
+        {'user_id': user.id, 'problem_id': str(event['problem_id']), 'solved_at': now}
+        for _, event in fresh if event['activity_type'] == 'problem' and event.get('problem_id')
+    ])
+    progress.total_study_time += sum(
+        event.get('time_spent', 0) for _, event in fresh if event['activity_type'] == 'study_session'
+    )
+    advance_streak(progress, now)
+    
+    db.session.execute(insert(UserActivity), [{
+        'user_id': user.id,
+        'activity_type': event['activity_type'],
+        'activity_name': event.get('activity_name', ''),
+        'score': event.get('score', 0),
+        'time_spent': event.get('time_spent', 0),
+        'created_at': now
+    } for _, event in fresh])
+    db.session.execute(insert(ProgressEvent), [
+        {'user_id': user.id, 'event_id': event_id, 'applied_at': now} for event_id, _ in fresh
+    ])
+    return {
+        'applied': len(fresh),
+        'duplicates': len(events) - len(fresh),
+        'leaderboard': sync_leaderboard(user.id, progress),
+        **progress_snapshot(user, progress)
+    }
+
+@app.route('/api/progress/batch', methods=['POST'])
+@jwt_required()
+def update_progress_batch():
+    """Apply a burst of progress events in one transaction - retries never double-count 📦"""
+    try:
+        user_id = get_jwt_identity()
+        data = request.get_json()
+        events = data.get('events') if isinstance(data, dict) else None
         
-        # Create activity record
-        activity = UserActivity(
-            user_id=user_id,
-            activity_type=activity_type,
-            activity_name=data.get('activity_name', ''),
-            score=data.get('score', 0),
-            time_spent=data.get('time_spent', 0)
-        )
-        db.session.add(activity)
+        if not isinstance(events, list) or not events:
+            return jsonify({'error': 'Events required'}), 400
+        if len(events) > PROGRESS_BATCH_MAX:
+            return jsonify({'error': f'At most {PROGRESS_BATCH_MAX} events per batch'}), 400
+        for event in events:
+            if not isinstance(event, dict) or not event.get('id') or not event.get('activity_type'):
+                return jsonify({'error': 'Every event needs an id and an activity_type'}), 400
+            if len(str(event['id'])) > 64:
+                return jsonify({'error': 'Event ids are at most 64 characters'}), 400
         
-        db.session.commit()
+        for attempt in range(2):
+            try:
+                result = write_queue.run(apply_progress_events, int(user_id), events)
+                break
+            except IntegrityError:
+                # A concurrent retry of the same batch committed first; the second pass skips its events
+                if attempt:
+                    raise
+        if result is None:
+            return jsonify({'error': 'User not found'}), 404
         
+        if result['leaderboard']:
+            leaderboard.apply(int(user_id), result['leaderboard'])
+        profile_cache.put(user_id, result['profile'])
         return jsonify({
             'message': 'Progress updated successfully! 🎉',
-            'progress': {
-                'completed_algorithms': json.loads(progress.completed_algorithms),
-                'solved_problems': json.loads(progress.solved_problems),
-                'total_study_time': progress.total_study_time,
-                'current_streak': progress.current_streak,
-                'longest_streak': progress.longest_streak
-            }
+            'applied': result['applied'],
+            'duplicates': result['duplicates'],
+            'progress': result['progress']
         }), 200
         
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': 'Failed to update progress', 'details': str(e)}), 500
 
+@app.route('/api/progress/problems/<problem_id>/solvers', methods=['GET'])
+@jwt_required()
+def get_problem_solvers(problem_id):
+    """How many users solved a problem, and when the latest did - served by the problem_id index 🔍"""
+    try:
+        count, last_solved = db.session.query(
+            db.func.count(SolvedProblem.user_id), db.func.max(SolvedProblem.solved_at)
+        ).filter(SolvedProblem.problem_id == problem_id).one()
+        
+        return jsonify({
+            'problem_id': problem_id,
+            'solved_count': count,
+            'last_solved_at': last_solved.isoformat() if last_solved else None
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': 'Failed to get solvers', 'details': str(e)}), 500
+
 @app.route('/api/activities', methods=['GET'])
 @jwt_required()
 def get_activities():
     """Get user's recent activities - see how awesome you are! 📈"""
     try:
         user_id = get_jwt_identity()
-        limit = request.args.get('limit', 10, type=int)
+        limit = max(1, min(request.args.get('limit', ACTIVITY_PAGE_SIZE, type=int), ACTIVITY_PAGE_MAX))
+        cursor = request.args.get('cursor')
         
-        activities = UserActivity.query.filter_by(user_id=user_id)\
-            .order_by(UserActivity.created_at.desc())\
-            .limit(limit).all()
+        # Only the columns the feed shows, no ORM objects
+        query = db.session.query(
+            UserActivity.id, UserActivity.activity_type, UserActivity.activity_name,
+            UserActivity.score, UserActivity.time_spent, UserActivity.created_at
+        ).filter(UserActivity.user_id == user_id)
+        if cursor:
+            try:
+                after = decode_cursor(cursor)
+            except ValueError:
+                return jsonify({'error': 'Invalid cursor'}), 400
+            query = query.filter(tuple_(UserActivity.created_at, UserActivity.id) < after)
+        
+        # One extra row tells us whether there is another page
+        activities = query.order_by(UserActivity.created_at.desc(), UserActivity.id.desc())\
+            .limit(limit + 1).all()
+        next_cursor = None
+        if len(activities) > limit:
+            activities = activities[:limit]
+            next_cursor = encode_cursor(activities[-1].created_at, activities[-1].id)
         
         return jsonify({
             'activities': [{
@@ -328,46 +1011,215 @@ def get_activities():
                 'score': activity.score,
                 'time_spent': activity.time_spent,
                 'created_at': activity.created_at.isoformat()
-            } for activity in activities]
+            } for activity in activities],
+            'next_cursor': next_cursor
         }), 200
         
     except Exception as e:
         return jsonify({'error': 'Failed to get activities', 'details': str(e)}), 500
 
-# Health check endpoint
-@app.route('/api/health', methods=['GET'])
-def health_check():
-    """Health check endpoint"""
-    return jsonify({
-        'status': 'healthy',
-        'cli_available': load_problems is not None and get_problem is not None and grade is not None
-    }), 200
-
-# Debug endpoint to check users
-@app.route('/api/debug/users', methods=['GET'])
-def debug_users():
-    """Debug endpoint to check registered users"""
+@app.route('/api/leaderboard', methods=['GET'])
+def get_leaderboard():
+    """Top users by solved problems, longest streak or study time 🏆"""
     try:
-        users = User.query.all()
+        metric = request.args.get('metric', 'solved')
+        if metric not in LEADERBOARD_METRICS:
+            return jsonify({'error': f"metric must be one of: {', '.join(LEADERBOARD_METRICS)}"}), 400
+        limit = max(1, min(request.args.get('limit', 10, type=int), LEADERBOARD_MAX))
+        
+        entries = leaderboard.top(metric, limit)
+        names = dict(db.session.query(User.id, User.name).filter(User.id.in_([e[1] for e in entries])).all())
+        
         return jsonify({
-            'total_users': len(users),
-            'users': [{
-                'id': user.id,
-                'email': user.email,
-                'name': user.name,
-                'created_at': user.created_at.isoformat() if user.created_at else None,
-                'last_login': user.last_login.isoformat() if user.last_login else None
-            } for user in users]
+            'metric': metric,
+            'leaders': [{
+                'rank': rank,
+                'user_id': user_id,
+                'name': names.get(user_id),
+                'value': value
+            } for rank, user_id, value in entries]
         }), 200
+        
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return jsonify({'error': 'Failed to get leaderboard', 'details': str(e)}), 500
+
+@app.route('/api/leaderboard/me', methods=['GET'])
+@jwt_required()
+def get_my_rank():
+    """Where the current user stands on every leaderboard 📈"""
+    try:
+        ranks, total = leaderboard.rank(int(get_jwt_identity()))
+        return jsonify({'ranks': ranks, 'total_users': total}), 200
+        
+    except Exception as e:
+        return jsonify({'error': 'Failed to get rank', 'details': str(e)}), 500
+
+def is_admin_request():
+    token = app.config['ADMIN_TOKEN']
+    return bool(token) and hmac.compare_digest(request.headers.get('X-Admin-Token', ''), token)
+
+# Debug endpoint for profile cache counters
+@app.route('/api/debug/profile-cache', methods=['GET'])
+def profile_cache_stats():
+    """Profile cache hit/miss counters for tuning PROFILE_CACHE_SIZE and PROFILE_CACHE_TTL"""
+    if not is_admin_request():
+        return jsonify({'error': 'Admin token required'}), 403
+    return jsonify(profile_cache.stats()), 200
+
+# Debug endpoint for write queue counters
+@app.route('/api/debug/write-queue', methods=['GET'])
+def write_queue_stats():
+    """Group-commit counters: how many write jobs each SQLite commit carried"""
+    if not is_admin_request():
+        return jsonify({'error': 'Admin token required'}), 403
+    return jsonify(write_queue.stats()), 200
+
+# Admin user export - streamed, so memory stays flat however many users there are 📤
+USER_EXPORT_FIELDS = ['id', 'email', 'name', 'created_at', 'last_login']
+USER_EXPORT_BATCH = 1000
+
+# query parameter -> (column, comparison); each column has its own index
+USER_EXPORT_FILTERS = {
+    'created_after': (User.created_at, '>='),
+    'created_before': (User.created_at, '<'),
+    'last_login_after': (User.last_login, '>='),
+    'last_login_before': (User.last_login, '<')
+}
+
+def export_rows(query, fmt):
+    """Encode the query's rows as NDJSON or CSV, one chunk of USER_EXPORT_BATCH rows at a time"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if fmt == 'csv' else None
+    if writer:
+        writer.writerow(USER_EXPORT_FIELDS)
+    for count, row in enumerate(query, 1):
+        values = [value.isoformat() if isinstance(value, datetime) else value for value in row]
+        if writer:
+            writer.writerow(values)
+        else:
+            buffer.write(json.dumps(dict(zip(USER_EXPORT_FIELDS, values))) + '\n')
+        if count % USER_EXPORT_BATCH == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+@app.route('/api/admin/users/export', methods=['GET'])
+def export_users():
+    """Stream users as NDJSON (default) or CSV, optionally filtered by signup and last login time"""
+    if not is_admin_request():
+        return jsonify({'error': 'Admin token required'}), 403
+    
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in ('ndjson', 'csv'):
+        return jsonify({'error': 'format must be ndjson or csv'}), 400
+    
+    query = db.session.query(User.id, User.email, User.name, User.created_at, User.last_login)
+    order_column = User.id
+    for param, (column, comparison) in USER_EXPORT_FILTERS.items():
+        if param in request.args:
+            try:
+                value = datetime.fromisoformat(request.args[param])
+            except ValueError:
+                return jsonify({'error': f'{param} must be an ISO 8601 date or datetime'}), 400
+            query = query.filter(column >= value if comparison == '>=' else column < value)
+            order_column = column
+    if request.args.get('never_logged_in') == 'true':
+        query = query.filter(User.last_login.is_(None))
+    
+    # Ordering by the filtered column walks its index in order, so the database never sorts the result;
+    # yield_per streams rows from a server-side cursor instead of loading them all
+    query = query.order_by(order_column, User.id).execution_options(yield_per=USER_EXPORT_BATCH)
+    extension, mimetype = ('csv', 'text/csv') if fmt == 'csv' else ('ndjson', 'application/x-ndjson')
+    return Response(
+        stream_with_context(export_rows(query, fmt)),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename=users.{extension}', 'X-Accel-Buffering': 'no'}
+    )
+
+# Problem listing - pre-encoded catalog snapshots with strong ETags 📚
+# Grader-only fields (hidden test specs, rules, instrumentation) stay out of the listing
+LISTED_PROBLEM_FIELDS = ('id', 'title', 'difficulty', 'description', 'input_desc', 'output_desc',
+                         'constraints', 'examples')
+
+class ProblemListing:
+    """JSON bodies for every (algorithm, difficulty) slice of the catalog, encoded and compressed once.
+
+    Everything is rebuilt when the catalog reloads problems.json. The ETag is a hash
+    of the body, so it is the same on every worker and host serving the same catalog;
+    each compressed variant gets its own suffix, as strong ETags must.
+    """
+
+    def __init__(self):
+        self._version = None
+        self._slices = {}
+        self._lock = threading.Lock()
+
+    def _build(self, problems, algorithm, difficulty):
+        listed = [
+            {'algorithm': name, **{field: problem[field] for field in LISTED_PROBLEM_FIELDS if field in problem}}
+            for name, entries in problems.items() if algorithm in (None, name)
+            for problem in entries if difficulty in (None, problem.get('difficulty', '').lower())
+        ]
+        body = json.dumps({'count': len(listed), 'problems': listed}, separators=(',', ':')).encode()
+        tag = hashlib.sha1(body).hexdigest()[:20]
+        variants = {'identity': (body, f'"{tag}"'), 'gzip': (gzip.compress(body, 9, mtime=0), f'"{tag}-gz"')}
+        if brotli:
+            variants['br'] = (brotli.compress(body), f'"{tag}-br"')
+        return variants
+
+    def get(self, algorithm=None, difficulty=None):
+        """{encoding: (body, etag)} for one slice; catalog.problems re-reads the file only if it changed"""
+        # Version and problems from one parse, so a body is never cached under another version
+        version, problems = catalog.snapshot()
+        key = (algorithm, difficulty)
+        with self._lock:
+            if self._version != version:
+                self._version, self._slices = version, {}
+            variants = self._slices.get(key)
+        if variants is None:
+            variants = self._build(problems, algorithm, difficulty)
+            with self._lock:
+                if self._version == version:
+                    self._slices[key] = variants
+        return variants
+
+problem_listing = ProblemListing()
+
+@app.route('/api/problems', methods=['GET'])
+def list_problems():
+    """Problem catalog, optionally sliced by ?algorithm= and ?difficulty= - cached and conditional 📚"""
+    if not catalog:
+        return jsonify({'error': 'CLI tools not available'}), 500
+    
+    algorithm = request.args.get('algorithm') or None
+    difficulty = (request.args.get('difficulty') or '').lower() or None
+    if algorithm and algorithm not in catalog.problems:
+        return jsonify({'error': 'Unknown algorithm'}), 404
+    if difficulty not in (None, 'easy', 'medium', 'hard'):
+        return jsonify({'error': 'difficulty must be easy, medium or hard'}), 400
+    
+    variants = problem_listing.get(algorithm, difficulty)
+    headers = {'Vary': 'Accept-Encoding', 'Cache-Control': 'public, max-age=60'}
+    
+    # Any representation the client already has is still current
+    for _, etag in variants.values():
+        if request.if_none_match.contains_weak(etag.strip('"')):
+            return Response(status=304, headers={**headers, 'ETag': etag})
+    
+    encoding = next((name for name in ('br', 'gzip') if name in variants and request.accept_encodings[name]),
+                    'identity')
+    body, etag = variants[encoding]
+    if encoding != 'identity':
+        headers['Content-Encoding'] = encoding
+    return Response(body, mimetype='application/json', headers={**headers, 'ETag': etag})
 
 # API endpoint for running code with CLI tool
 @app.route('/api/run-code', methods=['POST'])
 def run_code():
     """Run code using the AlgoFlow CLI tool"""
     try:
-        if not load_problems or not get_problem or not grade:
+        if not catalog or not grade:
             return jsonify({'error': 'CLI tools not available'}), 500
         
         data = request.get_json()
@@ -378,54 +1230,130 @@ def run_code():
         if not code or not algorithm:
             return jsonify({'error': 'Missing code or algorithm parameter'}), 400
         
-        # Load problems
-        problems = load_problems()
-        
-        # Get the specific problem
-        problem = get_problem(problems, algorithm, problem_id)
+        # Look up the problem in the in-memory catalog
+        problem = catalog.get_problem(algorithm, problem_id)
         if not problem:
             return jsonify({'error': f'Problem {problem_id} not found for {algorithm}'}), 404
         
-        # Create a temporary file with the user's code
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False) as temp_file:
-            temp_file.write(code)
-            temp_file_path = temp_file.name
+        # Grade in a sandboxed worker process so bad code can't stall or crash this one;
+        # code already graded against the same problem definition comes straight from the cache
+        complexity = bool(data.get('checkComplexity'))
+        result = get_result_cache().get_or_run(
+            code, algorithm, problem_id,
+            lambda: get_pool().run(code, algorithm, problem_id, complexity=complexity),
+            rerun=complexity
+        )
+        return jsonify(result), 200
+                
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# Asynchronous submissions - grade in the background, poll or stream the results
+@app.route('/api/submissions', methods=['POST'])
+def submit_code():
+    """Queue code for grading and return a job ID right away"""
+    try:
+        if not catalog or not get_job_queue:
+            return jsonify({'error': 'CLI tools not available'}), 500
+        
+        data = request.get_json()
+        code = data.get('code', '')
+        algorithm = data.get('algorithm', '')
+        problem_id = data.get('problemId', 1)
+        
+        if not code or not algorithm:
+            return jsonify({'error': 'Missing code or algorithm parameter'}), 400
+        
+        if not catalog.get_problem(algorithm, problem_id):
+            return jsonify({'error': f'Problem {problem_id} not found for {algorithm}'}), 404
         
         try:
-            # Create a simple solve function wrapper
-            def solve_wrapper(input_data):
-                # Import the user's code
-                import importlib.util
-                spec = importlib.util.spec_from_file_location("user_solution", temp_file_path)
-                user_module = importlib.util.module_from_spec(spec)
-                spec.loader.exec_module(user_module)
-                
-                # Call the solve function
-                if hasattr(user_module, 'solve'):
-                    return user_module.solve(input_data)
-                else:
-                    raise AttributeError("No 'solve' function found in your code")
-            
-            # Grade the solution
-            results = grade(solve_wrapper, problem, solution_file=temp_file_path)
-            
-            return jsonify({"results": results}), 200
-            
-        finally:
-            # Clean up temporary file
-            if os.path.exists(temp_file_path):
-                os.unlink(temp_file_path)
-                
+            job = get_job_queue().submit(code, algorithm, problem_id, complexity=bool(data.get('checkComplexity')))
+        except QueueFull as e:
+            return jsonify({'error': str(e)}), 429
+        
+        return jsonify({'job_id': job.id, 'status': job.status}), 202
+        
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/submissions/<job_id>', methods=['GET'])
+def get_submission(job_id):
+    """Current status of a grading job plus any test results so far"""
+    job_queue = get_job_queue(create=False) if get_job_queue else None
+    job = job_queue.get(job_id) if job_queue else None
+    if not job:
+        return jsonify({'error': 'Submission not found'}), 404
+    return jsonify(job.to_dict()), 200
+
+@app.route('/api/submissions/<job_id>/events', methods=['GET'])
+def stream_submission(job_id):
+    """Server-Sent Events stream of test results as the grader produces them"""
+    job_queue = get_job_queue(create=False) if get_job_queue else None
+    job = job_queue.get(job_id) if job_queue else None
+    if not job:
+        return jsonify({'error': 'Submission not found'}), 404
+    return Response(
+        stream_with_context(job_queue.stream(job)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 # Database initialization - create tables if they don't exist
-@app.before_first_request
 def create_tables():
     """Create database tables - the foundation of our app! 🏗️"""
     db.create_all()
+    create_missing_indexes()
+    backfill_leaderboard()
     print("Database tables created successfully! 🎉")
 
+def create_missing_indexes():
+    """Add indexes declared since a table was created - create_all() skips existing tables 🗂️"""
+    # IF NOT EXISTS, so several app processes starting at once don't race each other
+    with db.engine.begin() as connection:
+        for table in db.metadata.sorted_tables:
+            for index in table.indexes:
+                connection.execute(CreateIndex(index, if_not_exists=True))
+
+def sync_all_leaderboard_entries():
+    """Write every user's leaderboard row from the progress tables; returns how many were missing or had drifted"""
+    drifted = 0
+    for progress in UserProgress.query.all():
+        migrate_legacy_progress(progress)
+        values = leaderboard_values(progress.user_id, progress)
+        entry = LeaderboardEntry.query.get(progress.user_id)
+        if entry is None or any(getattr(entry, column) != value for column, value in values.items()):
+            drifted += 1
+            upsert(LeaderboardEntry, {'user_id': progress.user_id, 'updated_at': datetime.utcnow(), **values}, ['user_id'])
+    db.session.commit()
+    return drifted
+
+def backfill_leaderboard():
+    """Fill the leaderboard table on a database that predates it - the same rows rebuild-leaderboard writes 🏆"""
+    # Upserts, so several app processes starting at once just write the same rows
+    if LeaderboardEntry.query.first() is None and UserProgress.query.first() is not None:
+        filled = sync_all_leaderboard_entries()
+        print(f"Leaderboard back-filled for {filled} users 🏆")
+
+# Flask 2.3 dropped before_first_request, so the schema is set up once at startup instead
+with app.app_context():
+    create_tables()
+
+@app.cli.command('create-indexes')
+def create_indexes():
+    """Back-fill missing indexes on an existing database"""
+    create_missing_indexes()
+    print("Indexes up to date! 🗂️")
+
+@app.cli.command('rebuild-leaderboard')
+def rebuild_leaderboard():
+    """Recompute every leaderboard row from the progress tables and report rows that had drifted"""
+    db.create_all()
+    drifted = sync_all_leaderboard_entries()
+    leaderboard.reset()
+    leaderboard.refresh(force=True)
+    print(f"Leaderboard rebuilt: {len(leaderboard)} users, {drifted} rows corrected 🏆")
+
 # WSGI entry point for Elastic Beanstalk
 application = app
 
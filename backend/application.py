@@ -3,6 +3,9 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_bcrypt import Bcrypt
 from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt_identity
 from datetime import datetime, timedelta
+import os
+
+from sqlite_storage import WriteQueue, configure_sqlite, sqlite_engine_options
 
 app = Flask(__name__)
 
@@ -12,11 +15,16 @@ app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///algoflow.db'
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['JWT_SECRET_KEY'] = 'algoflow-jwt-secret-key-2024'
 app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(days=7)
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = sqlite_engine_options(
+    app.config['SQLALCHEMY_DATABASE_URI'], read_pool_size=int(os.environ.get('SQLITE_READ_POOL_SIZE', 8))
+)
 
 # Initialize extensions
 db = SQLAlchemy(app)
 bcrypt = Bcrypt(app)
 jwt = JWTManager(app)
+# WAL pragmas on every connection; request writes are group-committed by one writer thread
+write_queue = WriteQueue(app, db, enabled=configure_sqlite(app, db) and os.environ.get('SQLITE_WRITE_QUEUE', '1') == '1')
 
 # Database Models
 class User(db.Model):
@@ -165,7 +173,7 @@ def login():
         
         # Update last login
         user.last_login = datetime.utcnow()
-        db.session.commit()
+        write_queue.run(touch_last_login, user.id, user.last_login)
         
         access_token = create_access_token(identity=user.id)
         
@@ -201,6 +209,50 @@ def get_profile():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# Write jobs - run and committed by write_queue
+def touch_last_login(user_id, when):
+    User.query.filter_by(id=user_id).update({'last_login': when})
+
+def record_progress(user_id, data):
+    """Apply one progress event; returns the updated progress as a dict"""
+    # Get or create user progress
+    progress = UserProgress.query.filter_by(user_id=user_id).first()
+    if not progress:
+        progress = UserProgress(user_id=user_id)
+        db.session.add(progress)
+    
+    # Update progress based on activity type
+    if data.get('activity_type') == 'algorithm' and data.get('algorithm_id'):
+        if data['algorithm_id'] not in progress.completed_algorithms:
+            progress.completed_algorithms.append(data['algorithm_id'])
+    
+    elif data.get('activity_type') == 'problem' and data.get('problem_id'):
+        if data['problem_id'] not in progress.solved_problems:
+            progress.solved_problems.append(data['problem_id'])
+    
+    # Update study time
+    if data.get('time_spent'):
+        progress.total_study_time += data['time_spent']
+    
+    # Update streak (simple logic)
+    progress.current_streak += 1
+    if progress.current_streak > progress.longest_streak:
+        progress.longest_streak = progress.current_streak
+    
+    progress.last_activity_date = datetime.utcnow()
+    
+    # Create activity record
+    activity = UserActivity(
+        user_id=user_id,
+        type=data.get('activity_type', 'unknown'),
+        name=data.get('activity_name', 'Unknown Activity'),
+        score=data.get('score', 0),
+        time_spent=data.get('time_spent', 0)
+    )
+    
+    db.session.add(activity)
+    return progress.to_dict()
+
 # Progress tracking endpoints
 @app.route('/api/progress/update', methods=['POST'])
 @jwt_required()
@@ -209,47 +261,9 @@ def update_progress():
         user_id = get_jwt_identity()
         data = request.get_json()
         
-        # Get or create user progress
-        progress = UserProgress.query.filter_by(user_id=user_id).first()
-        if not progress:
-            progress = UserProgress(user_id=user_id)
-            db.session.add(progress)
-        
-        # Update progress based on activity type
-        if data.get('activity_type') == 'algorithm' and data.get('algorithm_id'):
-            if data['algorithm_id'] not in progress.completed_algorithms:
-                progress.completed_algorithms.append(data['algorithm_id'])
-        
-        elif data.get('activity_type') == 'problem' and data.get('problem_id'):
-            if data['problem_id'] not in progress.solved_problems:
-                progress.solved_problems.append(data['problem_id'])
-        
-        # Update study time
-        if data.get('time_spent'):
-            progress.total_study_time += data['time_spent']
-        
-        # Update streak (simple logic)
-        progress.current_streak += 1
-        if progress.current_streak > progress.longest_streak:
-            progress.longest_streak = progress.current_streak
-        
-        progress.last_activity_date = datetime.utcnow()
-        
-        # Create activity record
-        activity = UserActivity(
-            user_id=user_id,
-            type=data.get('activity_type', 'unknown'),
-            name=data.get('activity_name', 'Unknown Activity'),
-            score=data.get('score', 0),
-            time_spent=data.get('time_spent', 0)
-        )
-        
-        db.session.add(activity)
-        db.session.commit()
-        
         return jsonify({
             'message': 'Progress updated successfully',
-            'progress': progress.to_dict()
+            'progress': write_queue.run(record_progress, user_id, data)
         }), 200
         
     except Exception as e:
@@ -0,0 +1,145 @@
+"""
+SQLite storage layer - WAL pragmas on every connection, and one writer thread that group-commits 🗄️
+"""
+import queue
+import threading
+from concurrent.futures import Future
+
+from sqlalchemy import event
+
+SQLITE_PRAGMAS = (
+    ('journal_mode', 'WAL'),         # readers and the writer stop blocking each other
+    ('synchronous', 'NORMAL'),       # with WAL, fsync at checkpoints instead of every commit
+    ('busy_timeout', 5000),          # wait up to 5 s for another process's write lock instead of "database is locked"
+    ('mmap_size', 256 * 1024 * 1024),
+    ('temp_store', 'MEMORY'),
+    ('cache_size', -16000),          # 16 MB page cache per connection
+)
+
+# Set while a write job runs, so its transaction takes the write lock up front
+_writing = threading.local()
+
+
+def sqlite_engine_options(uri, read_pool_size=8):
+    """SQLALCHEMY_ENGINE_OPTIONS for a SQLite URI: a pool of reader connections; {} for other databases"""
+    if not uri.startswith('sqlite') or uri in ('sqlite://', 'sqlite:///:memory:'):
+        return {}
+    return {'pool_size': read_pool_size, 'max_overflow': read_pool_size, 'connect_args': {'timeout': 5}}
+
+
+def configure_sqlite(app, db):
+    """Apply SQLITE_PRAGMAS to every connection and let SQLAlchemy manage transactions; no-op unless SQLite.
+
+    pysqlite defers BEGIN until the first INSERT/UPDATE, which breaks SAVEPOINTs and lets two
+    writers deadlock upgrading read locks. Emitting BEGIN ourselves (BEGIN IMMEDIATE for write
+    jobs) is the fix SQLAlchemy's SQLite documentation recommends.
+    """
+    with app.app_context():
+        engine = db.engine
+    if engine.dialect.name != 'sqlite':
+        return False
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        for name, value in SQLITE_PRAGMAS:
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+
+    @event.listens_for(engine, 'begin')
+    def begin(connection):
+        connection.exec_driver_sql('BEGIN IMMEDIATE' if getattr(_writing, 'active', False) else 'BEGIN')
+
+    engine.dispose()  # connections opened before the listeners existed
+    return True
+
+
+class WriteQueue:
+    """Runs write jobs on one thread, committing everything that queued up meanwhile in one transaction.
+
+    A job is a function that changes the database through db.session without committing and
+    returns plain data (not ORM objects). Each runs in its own SAVEPOINT, so a failing job is
+    rolled back alone and its caller gets the exception. If the group commit itself fails,
+    the jobs are retried in a transaction each. Disabled, run() executes the job in the
+    calling thread under the same rules, in a transaction of its own.
+    """
+
+    def __init__(self, app, db, enabled=True, max_batch=64):
+        self.app = app
+        self.db = db
+        self.enabled = enabled
+        self.max_batch = max_batch
+        self.batches = 0
+        self.jobs = 0
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def run(self, fn, *args):
+        """Run a write job and return its result once it has been committed"""
+        if not self.enabled:
+            future = Future()
+            self._commit([(fn, args, future)])
+            return future.result()
+        return self.submit(fn, *args).result()
+
+    def submit(self, fn, *args):
+        """Queue a write job; the returned Future resolves after its commit"""
+        future = Future()
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='sqlite-writer', daemon=True)
+                self._thread.start()
+        self._queue.put((fn, args, future))
+        return future
+
+    def stats(self):
+        return {
+            'enabled': self.enabled,
+            'queued': self._queue.qsize(),
+            'batches': self.batches,
+            'jobs': self.jobs,
+            'jobs_per_commit': round(self.jobs / self.batches, 2) if self.batches else None
+        }
+
+    def _run(self):
+        while True:
+            # Whatever arrived while the last commit was in flight goes into the next one
+            jobs = [self._queue.get()]
+            while len(jobs) < self.max_batch:
+                try:
+                    jobs.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._commit(jobs)
+
+    def _commit(self, jobs):
+        session = self.db.session
+        _writing.active = True
+        try:
+            with self.app.app_context():
+                done = []
+                for fn, args, future in jobs:
+                    try:
+                        with session.begin_nested():
+                            done.append((fn, args, future, fn(*args)))
+                    except Exception as e:
+                        future.set_exception(e)
+                try:
+                    session.commit()
+                except Exception as e:
+                    session.rollback()
+                    if len(done) == 1:
+                        done[0][2].set_exception(e)
+                    else:
+                        for fn, args, future, _ in done:
+                            self._commit([(fn, args, future)])
+                    return
+                if done:
+                    self.batches += 1
+                    self.jobs += len(done)
+                for _, _, future, result in done:
+                    future.set_result(result)
+        finally:
+            _writing.active = False